@@ -1,6 +1,5 @@
 from time import time
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from ai import AI
@@ -179,6 +178,9 @@ class Q:
             exploration_factor = exploration_decay(exploration_factor)
         end = time()
 
+        # matplotlib is only needed for the final plots, keep it out of the (worker) startup
+        import matplotlib.pyplot as plt
+
         # plot results
         plt.title("Training scores")
         plt.plot(results, ".-g")
@@ -221,6 +223,8 @@ class Q:
         results = [self.__test() for _ in range(epochs)]
         end = time()
 
+        import matplotlib.pyplot as plt
+
         # plot results
         plt.title("Testing scores")
         plt.plot(results, ".-g")
@@ -1,8 +1,6 @@
 from random import choice, random
 from time import time
 
-import matplotlib.pyplot as plt
-
 from ai import AI
 from constants import CATEGORY_COUNT
 from state import GameState
@@ -61,6 +59,8 @@ class R:
             results.append(self.__train())
         end = time()
 
+        import matplotlib.pyplot as plt
+
         # stats
         plt.plot(results, ".-g")
         plt.savefig("qai_acc.png")
@@ -1,12 +1,10 @@
-import os
 from enum import Enum
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
-API_KEY = os.getenv("OPENAI_API_KEY")
 FPS = 144
+# frame rate while only waiting for background work (e.g. a chat response)
+IDLE_FPS = 15
+# when nothing can change until the next event, the game sleeps until then for at most this long (ms)
+IDLE_TIMEOUT = 1000
 
 
 class ScoreCategory(Enum):
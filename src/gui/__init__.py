@@ -2,3 +2,4 @@ from .button import Button
 from .dice import Dice
 from .sheet import Sheet
 from .ai_player import AIPlayer
+from .perf_hud import PerfHud
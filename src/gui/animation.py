@@ -0,0 +1,58 @@
+from collections.abc import Callable
+
+
+def linear(t: float) -> float:
+    return t
+
+
+def ease_in_cubic(t: float) -> float:
+    return t**3
+
+
+def ease_out_cubic(t: float) -> float:
+    return 1 - (1 - t) ** 3
+
+
+def ease_in_out_cubic(t: float) -> float:
+    return 4 * t**3 if t < 0.5 else 1 - (-2 * t + 2) ** 3 / 2
+
+
+class Tween:
+    """
+    Interpolates a position from `start` to `end` over `duration` seconds. The position only
+    depends on the time elapsed since the start (eased by `easing`, which maps [0, 1] onto [0, 1]),
+    so an animation takes the same time and ends at the same position at any frame rate.
+    """
+
+    def __init__(
+        self,
+        start: tuple[float, float],
+        end: tuple[float, float],
+        duration: float,
+        easing: Callable[[float], float] = linear,
+    ):
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = easing
+        self.elapsed = 0.0
+
+    def update(self, dt: float) -> float:
+        """
+        Advances the animation by `dt` seconds and returns the time left over after it finished
+        (0 while it is still running), so that a following animation can start from it.
+        """
+        self.elapsed += dt
+        return max(0.0, self.elapsed - self.duration)
+
+    @property
+    def finished(self) -> bool:
+        return self.elapsed >= self.duration
+
+    @property
+    def position(self) -> tuple[int, int]:
+        t = self.easing(min(1.0, self.elapsed / self.duration)) if self.duration > 0 else 1.0
+        return (
+            round(self.start[0] + (self.end[0] - self.start[0]) * t),
+            round(self.start[1] + (self.end[1] - self.start[1]) * t),
+        )
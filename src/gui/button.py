@@ -7,10 +7,18 @@ class Button:
         self.text = font.render(text, True, "black")
         self.text_rect = self.text.get_rect()
         self.text_rect.center = self.bounds.center
+        self.dirty = True
 
     def draw(self, screen):
         pygame.draw.rect(screen, "white", self.bounds)
         screen.blit(self.text, self.text_rect)
 
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """Returns the areas of the screen that changed since the last call (the button is static)."""
+        if not self.dirty:
+            return []
+        self.dirty = False
+        return [self.bounds]
+
     def clicked(self, pos):
         return self.bounds.collidepoint(*pos)
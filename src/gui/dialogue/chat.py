@@ -1,8 +1,11 @@
+from bisect import bisect_right
+from collections import OrderedDict
 from enum import Enum
 
 import pygame
 from pygame import Surface
 
+from gui.dialogue.text_layout import font_metrics, wrap_words
 from gui.dialogue.textbox import Textbox
 from gui.dialogue.gpt import GptResponse
 from state import GameState
@@ -23,37 +26,11 @@ def render_text_box(
     :param right_align: If True, align text to the right; otherwise, align to the left.
     :return: A pygame.Surface with the rendered text, and the rectangle size.
     """
-    words = text.split(' ')
-    lines = []
-    current_line = []
-
-    for word in words:
-        # Split word if it's too long to fit max_width
-        while font.size(word)[0] > max_width:
-            # Find the maximum number of characters that fit
-            for i in range(1, len(word) + 1):
-                if font.size(word[:i])[0] > max_width:
-                    # Add the chunk that fits and update the word
-                    current_line.append(word[:i - 1])
-                    lines.append(' '.join(current_line))
-                    current_line = []
-                    word = word[i - 1:]
-                    break
-        # Test the current line with the new word
-        test_line = ' '.join(current_line + [word])
-        if font.size(test_line)[0] <= max_width:
-            current_line.append(word)
-        else:
-            # Finalize the current line and start a new one
-            lines.append(' '.join(current_line))
-            current_line = [word]
-
-    # Add the last line
-    if current_line:
-        lines.append(' '.join(current_line))
+    lines = wrap_words(text, font, max_width)
 
     # Calculate the width of the rectangle
-    line_widths = [font.size(line)[0] for line in lines]
+    metrics = font_metrics(font)
+    line_widths = [metrics.width(line) for line in lines]
     text_width = min(max(line_widths), max_width) if line_widths else max_width
     line_height = font.get_linesize()
     text_height = line_height * len(lines)
@@ -80,7 +57,28 @@ class MessageSender(Enum):
     AI = "assistant"
 
 
+class ChatMessage:
+
+    def __init__(self, text: str, sender: MessageSender):
+        self.text = text
+        self.sender = sender
+        # set when first rendered and kept when the rendered message is evicted, so that laying out
+        # the history never needs to render it again
+        self.height = 0
+
+
 class Chat:
+    """
+    Chat history and input box. Only the messages that intersect the visible area are drawn, the
+    visible area is composed once and reused until it changes (new message or scroll) and only the
+    `MAX_RENDERED_MESSAGES` most recently shown messages are kept rendered, older ones are rendered
+    again from their text when scrolled back into view.
+    """
+
+    MESSAGE_GAP = 7
+    SCROLL_STEP = 40
+    MAX_RENDERED_MESSAGES = 64
+    BACKGROUND_COLOR = (20, 20, 20)
 
     def __init__(self, rect: pygame.Rect, input_box_height: int, font: pygame.font.Font):
         self.rect = rect
@@ -90,23 +88,32 @@ class Chat:
             empty_text="Write to our AI here",
             character_limit=306
         )
-        self.messages: list[tuple[Surface, MessageSender]] = []
+        self.messages: list[ChatMessage] = []
+        # bottom of each message (gap included) measured from the top of the history
+        self.message_bottoms: list[int] = []
+        self.rendered_messages: OrderedDict[int, Surface] = OrderedDict()
+        self.messages_rect = pygame.Rect(rect.left, rect.top, rect.width, self.input_box.rect.top - rect.top)
+        # distance from the bottom of the history to the bottom of the visible area
+        self.scroll = 0
+        self.view: Surface | None = None
         self.message_history: list[dict[str, str]] = []
         self.building_response = False
         self.ai_response = None
         self.feedback_response = None
+        self.dirty = True
 
     def handle_event(self, event: pygame.event.Event, game_state: GameState):
+        if event.type == pygame.MOUSEWHEEL and self.messages_rect.collidepoint(pygame.mouse.get_pos()):
+            self.__scroll_to(self.scroll + event.y * Chat.SCROLL_STEP)
+            return
+
         if self.building_response:
             return
 
         text = self.input_box.handle_event(event)
         if text is None or not text.strip():
             return
-        self.messages.append((
-            render_text_box(text, self.input_box.font, self.rect.width * 4 // 5, right_align=True),
-            MessageSender.Player
-        ))
+        self.__add_message(text, MessageSender.Player)
         self.message_history.append({"role": MessageSender.Player.value, "content": text})
         self.building_response = True
         self.ai_response = GptResponse.chat(self.message_history, game_state)
@@ -130,22 +137,90 @@ class Chat:
         if not response.is_response_ready:
             return False
         text = response.response
-        self.messages.append((
-            render_text_box(text, self.input_box.font, self.rect.width * 4 // 5),
-            MessageSender.AI
-        ))
+        self.__add_message(text, MessageSender.AI)
         self.message_history.append({"role": MessageSender.AI.value, "content": text})
         return True
 
+    def __render_message(self, index: int) -> Surface:
+        if index in self.rendered_messages:
+            self.rendered_messages.move_to_end(index)
+            return self.rendered_messages[index]
+
+        message = self.messages[index]
+        surface = render_text_box(
+            message.text,
+            self.input_box.font,
+            self.rect.width * 4 // 5,
+            right_align=message.sender == MessageSender.Player,
+        )
+        message.height = surface.get_height()
+        self.rendered_messages[index] = surface
+        if len(self.rendered_messages) > Chat.MAX_RENDERED_MESSAGES:
+            self.rendered_messages.popitem(last=False)
+
+        return surface
+
+    def __add_message(self, text: str, sender: MessageSender):
+        self.messages.append(ChatMessage(text, sender))
+        height = self.__render_message(len(self.messages) - 1).get_height()
+
+        bottom = (self.message_bottoms[-1] if self.message_bottoms else 0) + height + Chat.MESSAGE_GAP
+        self.message_bottoms.append(bottom)
+
+        # keep the view where it is if the user scrolled back
+        if self.scroll > 0:
+            self.scroll += height + Chat.MESSAGE_GAP
+        self.view = None
+        self.dirty = True
+
+    def __scroll_to(self, scroll: int):
+        history_height = self.message_bottoms[-1] if self.message_bottoms else 0
+        scroll = max(0, min(scroll, history_height - self.messages_rect.height))
+        if scroll != self.scroll:
+            self.scroll = scroll
+            self.view = None
+            self.dirty = True
+
+    def __compose_view(self) -> Surface:
+        view = Surface(self.messages_rect.size)
+        view.fill(Chat.BACKGROUND_COLOR)
+        if not self.messages:
+            return view
+
+        # visible part of the history, measured from its top
+        view_bottom = self.message_bottoms[-1] - self.scroll
+        view_top = view_bottom - self.messages_rect.height
+
+        for index in range(bisect_right(self.message_bottoms, view_top), len(self.messages)):
+            message = self.messages[index]
+            top = self.message_bottoms[index] - message.height - Chat.MESSAGE_GAP
+            if top >= view_bottom:
+                break
+
+            surface = self.__render_message(index)
+            left_shift = int(message.sender == MessageSender.Player) * (self.rect.width - surface.get_width())
+            view.blit(surface, (left_shift, self.messages_rect.height - (view_bottom - top)))
+
+        return view
+
     def generate_feedback(self, game_state: GameState):
         self.feedback_response = GptResponse.feedback(self.message_history, game_state)
         self.building_response = True
 
+    def in_animation(self) -> bool:
+        """Returns if the chat changes from frame to frame on its own (i.e. the cursor is blinking)."""
+        return self.input_box.active
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """Returns the areas of the screen that changed since the last call."""
+        input_box_rects = self.input_box.dirty_rects()
+        if not self.dirty:
+            return input_box_rects
+        self.dirty = False
+        return [self.rect]
+
     def draw(self, screen: pygame.Surface):
-        pygame.draw.rect(screen, (20, 20, 20), self.rect)
+        if self.view is None:
+            self.view = self.__compose_view()
+        screen.blit(self.view, self.messages_rect.topleft)
         self.input_box.draw(screen)
-        height = self.input_box.rect.top
-        for message, sender in reversed(self.messages):
-            height -= message.get_height() + 7
-            left_shift = int(sender == MessageSender.Player) * (self.rect.width - message.get_width())
-            screen.blit(message, (self.rect.left + left_shift, height))
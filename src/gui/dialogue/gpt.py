@@ -1,17 +1,33 @@
 import threading
-
-from openai import OpenAI
+import time
+from collections import deque
+from functools import cache
 
 from constants import ScoreCategory, CATEGORY_COUNT
 from state import GameState
 
-client = OpenAI()
+
+@cache
+def get_client():
+    """
+    Return the OpenAI client, creating it on first use. The `openai` package and the `.env` file
+    are only loaded once a message is actually sent, so the game starts without touching them.
+    """
+    from dotenv import load_dotenv
+    from openai import OpenAI
+
+    load_dotenv()
+    return OpenAI()
 
 
 class GptResponse:
+    # time taken by the last responses (in seconds, from the request to the response being ready)
+    latencies: deque[float] = deque(maxlen=32)
+
     def __init__(self, message_history: list[dict[str, str]]):
         self._is_response_ready = False
         self._response = None
+        self.latency: float | None = None
         self.header = ""
         self.message_history = message_history
 
@@ -64,8 +80,9 @@ class GptResponse:
         threading.Thread(target=self._request_ai).start()
 
     def _request_ai(self):
+        start = time.perf_counter()
         try:
-            completion = client.chat.completions.create(
+            completion = get_client().chat.completions.create(
                 model="gpt-4o",
                 messages=[{"role": "system", "content": self.header}, *self.message_history],
                 max_tokens=150,
@@ -74,6 +91,8 @@ class GptResponse:
         except Exception as e:
             self._response = str(e)
         finally:
+            self.latency = time.perf_counter() - start
+            GptResponse.latencies.append(self.latency)
             self._is_response_ready = True
 
     @property
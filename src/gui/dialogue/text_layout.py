@@ -0,0 +1,164 @@
+from collections.abc import Iterator
+from functools import cache
+
+import pygame
+
+# extent of a piece of text, relative to where its first glyph is drawn: (advance, left, right),
+# with left <= 0 <= right being the furthest any glyph reaches on each side
+Extent = tuple[int, int, int]
+EMPTY_EXTENT: Extent = (0, 0, 0)
+
+
+def join_extents(a: Extent, b: Extent) -> Extent:
+    """Returns the extent of a piece of text with extent `a` followed by one with extent `b`."""
+    return a[0] + b[0], min(a[1], a[0] + b[1]), max(a[2], a[0] + b[2])
+
+
+def extent_width(extent: Extent) -> int:
+    """Returns the width of a piece of text with the given extent, as `font.size` would."""
+    return max(extent[0], extent[2]) - extent[1]
+
+
+class FontMetrics:
+    """
+    Measures text using the metrics of each glyph, which are looked up once per font and cached,
+    instead of asking SDL_ttf to lay out the whole string on every `font.size` call. Extents can be
+    joined, so measuring a line grown by one word only costs as much as measuring the word.
+    """
+
+    def __init__(self, font: pygame.font.Font):
+        self.font = font
+        self.glyphs: dict[str, Extent] = {}
+
+    def glyph(self, char: str) -> Extent:
+        extent = self.glyphs.get(char)
+        if extent is None:
+            metrics = self.font.metrics(char)[0]
+            if metrics is None:
+                # no metrics for glyphs missing from the font, measure whatever SDL_ttf renders instead
+                width = self.font.size(char)[0]
+                extent = (width, 0, width)
+            else:
+                min_x, max_x, _, _, advance = metrics
+                extent = (advance, min(0, min_x), max(0, max_x))
+            self.glyphs[char] = extent
+        return extent
+
+    def extent(self, text: str) -> Extent:
+        extent = EMPTY_EXTENT
+        for char in text:
+            extent = join_extents(extent, self.glyph(char))
+        return extent
+
+    def width(self, text: str) -> int:
+        """Same as `font.size(text)[0]`."""
+        return extent_width(self.extent(text))
+
+
+@cache
+def font_metrics(font: pygame.font.Font) -> FontMetrics:
+    """Returns the metrics of `font`, shared by everything laying out text with it."""
+    return FontMetrics(font)
+
+
+def split_word(
+    word: str, metrics: FontMetrics, max_width: int, suffix: Extent = EMPTY_EXTENT
+) -> list[tuple[str, Extent]]:
+    """
+    Splits `word` into as few chunks as possible, each as long as possible, such that every chunk
+    followed by `suffix` fits in `max_width` (chunks have at least one character, even if it does
+    not fit). Returns the chunks along with their extents, in one pass over the word.
+    """
+    chunks = []
+    start = 0
+    extent = EMPTY_EXTENT
+
+    for i, char in enumerate(word):
+        grown = join_extents(extent, metrics.glyph(char))
+        if i > start and extent_width(join_extents(grown, suffix)) > max_width:
+            chunks.append((word[start:i], extent))
+            start = i
+            extent = metrics.glyph(char)
+        else:
+            extent = grown
+    chunks.append((word[start:], extent))
+
+    return chunks
+
+
+def wrap_words(text: str, font: pygame.font.Font, max_width: int) -> list[str]:
+    """
+    Wraps `text` into lines no wider than `max_width`, breaking lines between words and splitting
+    words that are too long to fit on a line on their own.
+    """
+    metrics = font_metrics(font)
+    space = metrics.glyph(" ")
+
+    lines = []
+    current_line = []
+    current_extent = EMPTY_EXTENT
+
+    for word in text.split(" "):
+        extent = metrics.extent(word)
+
+        if extent_width(extent) > max_width:
+            *chunks, (word, extent) = split_word(word, metrics, max_width)
+            for chunk, _ in chunks:
+                # the first chunk ends the current line, the others take a whole line each
+                current_line.append(chunk)
+                lines.append(" ".join(current_line))
+                current_line = []
+
+        test_extent = join_extents(join_extents(current_extent, space), extent) if current_line else extent
+        if extent_width(test_extent) <= max_width:
+            current_line.append(word)
+            current_extent = test_extent
+        else:
+            lines.append(" ".join(current_line))
+            current_line = [word]
+            current_extent = extent
+
+    if current_line:
+        lines.append(" ".join(current_line))
+
+    return lines
+
+
+def wrap_lines(text: str, font: pygame.font.Font, max_width: int, start: int = 0) -> Iterator[tuple[str, int]]:
+    """
+    Wraps `text`, from position `start` on, into lines no wider than `max_width` and yields them
+    along with the position in `text` where they start. Every word on a line is followed by a
+    space (which may not fit in `max_width`) and words too long to fit on a line are split.
+
+    Lines are produced lazily, so re-wrapping an edited text can start from the line before the
+    edit and stop as soon as the new lines line up with the old ones again.
+    """
+    metrics = font_metrics(font)
+    space = metrics.glyph(" ")
+
+    current_line = ""
+    current_extent = EMPTY_EXTENT
+    line_start = pos = start
+
+    for word in text[start:].split(" "):
+        extent = metrics.extent(word)
+        if extent_width(join_extents(extent, space)) <= max_width:
+            chunks = [(word, extent)]
+        else:
+            chunks = split_word(word, metrics, max_width, space)
+
+        for chunk, extent in chunks:
+            test_extent = join_extents(join_extents(current_extent, extent), space)
+            if extent_width(test_extent) <= max_width:
+                current_line += f"{chunk} "
+                current_extent = test_extent
+            else:
+                yield current_line, line_start
+                current_line = f"{chunk} "
+                current_extent = join_extents(extent, space)
+                line_start = pos
+            pos += len(chunk)
+        # the space after the word
+        pos += 1
+
+    yield current_line, line_start
@@ -1,7 +1,10 @@
+from bisect import bisect_left, bisect_right
 from functools import partial
 
 import pygame
 
+from gui.dialogue.text_layout import wrap_lines
+
 
 class Textbox:
 
@@ -27,10 +30,13 @@ class Textbox:
         self.text = text
         self.lines = []
         self.text_surfaces = []
-        self.is_line_word_continuation = []
-        self.line_pos_to_text_pos = []
+        # position in the text of the first character of each line
+        self.line_starts = []
         self.text_color = text_color
-        self.empty_text_surfaces = self.__render_lines(self.__wrap_text(empty_text)[0], empty_text_color)
+        self.max_text_width = self.rect.width - 10 + self.font.size(" ")[0]
+        self.empty_text_surfaces = self.__render_lines(
+            [line for line, _ in wrap_lines(empty_text, self.font, self.max_text_width)], empty_text_color
+        )
         self.background_color = background_color
         self.border_width = border_width
         self.border_color = border_color
@@ -40,6 +46,7 @@ class Textbox:
         self.is_cursor_visible = False
         self.locked = False
         self.character_limit = character_limit
+        self.dirty = True
         self.max_chars_per_line = (self.rect.width - 10) // self.font.size("a")[0]
         self.__wrap_text_and_set_pos()
 
@@ -48,13 +55,14 @@ class Textbox:
             return
 
         if event.type == pygame.MOUSEBUTTONDOWN:
-            if self.rect.collidepoint(event.pos):
-                self.active = True
-            else:
-                self.active = False
+            active = self.rect.collidepoint(event.pos)
+            if active != self.active:
+                self.active = active
+                self.dirty = True
             return
 
         if event.type == pygame.KEYDOWN and self.active:
+            self.dirty = True
             match event.key:
                 case pygame.K_ESCAPE:
                     self.active = False
@@ -109,73 +117,59 @@ class Textbox:
             if prev_text_pos is None:
                 self.cursor_index = (self.cursor_index[0] + 1, 0)
             else:
-                current_pos = self.line_pos_to_text_pos[self.cursor_index[0] + 1][0]
+                current_pos = self.__line_text_positions(self.cursor_index[0] + 1)[0]
                 self.cursor_index = (self.cursor_index[0] + 1, prev_text_pos - current_pos)
 
         if self.cursor_index[0] != 0 and self.cursor_index[1] == 0 and len(self.lines[self.cursor_index[0]]) == 0:
             self.cursor_index = (self.cursor_index[0] - 1, len(self.lines[self.cursor_index[0] - 1]) - 1)
 
-    def __wrap_text(self, text) -> tuple[list[str], list[bool]]:
-        max_text_width = self.rect.width - 10 + self.font.size(" ")[0]
-        separated_text = []
-        word_index = 0
-        for word in text.split(" "):
-            if self.font.size(word + " ")[0] <= max_text_width:
-                separated_text.append((word, word_index))
-            else:
-                current_word = ""
-                for ch in word:
-                    test_word = current_word + ch
-                    if self.font.size(test_word + " ")[0] <= max_text_width:
-                        current_word = test_word
-                    else:
-                        separated_text.append((current_word, word_index))
-                        current_word = ch
-                if current_word != "":
-                    separated_text.append((current_word, word_index))
-            word_index += 1
-
-        lines = []
-        is_line_word_continuation = []
-        current_line = ""
-        for i, (word, word_index) in enumerate(separated_text):
-            test_line = f"{current_line}{word} "
-            if self.font.size(test_line)[0] <= max_text_width:
-                current_line = test_line
-            else:
-                lines.append(current_line)
-                if len(lines) >= 1 and separated_text[i - 1][1] == word_index:
-                    is_line_word_continuation.append(True)
-                else:
-                    is_line_word_continuation.append(False)
-                current_line = f"{word} "
-        if current_line != "":
-            lines.append(current_line)
-            if len(lines) >= 1 and separated_text[-1][1] == word_index:
-                is_line_word_continuation.append(True)
-            else:
-                is_line_word_continuation.append(False)
-
-        return lines, is_line_word_continuation
-
-    def __set_line_pos_to_text_pos(self):
-        self.line_pos_to_text_pos.clear()
-        pos = 0
-        for (line, is_continuation) in zip(self.lines, self.is_line_word_continuation):
-            self.line_pos_to_text_pos.append(list(range(pos, pos + len(line))))
-            pos += len(line) - int(is_continuation)
-
-    def __wrap_text_and_set_pos(self):
-        self.lines, self.is_line_word_continuation = self.__wrap_text(self.text)
-        self.text_surfaces = self.__render_lines(self.lines)
-        self.__set_line_pos_to_text_pos()
+    def __line_text_positions(self, line_index: int) -> range:
+        """Returns the positions in the text of the characters of a line."""
+        return range(self.line_starts[line_index], self.line_starts[line_index] + len(self.lines[line_index]))
+
+    def __wrap_text_and_set_pos(self, edit_pos: int | None = None, delta: int = 0):
+        """
+        Wraps the text into lines and renders them. After an edit of `delta` characters at
+        `edit_pos`, only the lines from the one before the edited word are wrapped again, until
+        they line up with the old lines again, so an edit only re-renders the lines it changed.
+        """
+        if edit_pos is None:
+            first_line = 0
+        else:
+            # the edited word may now fit on the line before the one it starts on (or no longer fit)
+            word_start = self.text.rfind(" ", 0, edit_pos) + 1
+            first_line = max(0, bisect_right(self.line_starts, word_start) - 2)
+
+        lines = self.lines[:first_line]
+        line_starts = self.line_starts[:first_line]
+        text_surfaces = self.text_surfaces[:first_line]
+
+        start = self.line_starts[first_line] if first_line < len(self.line_starts) else 0
+        for line, line_start in wrap_lines(self.text, self.font, self.max_text_width, start):
+            if edit_pos is not None and line_start > edit_pos + max(delta, 1):
+                # past the edit, lines starting where an old line started are the same as before
+                old_line = bisect_left(self.line_starts, line_start - delta)
+                if old_line < len(self.line_starts) and self.line_starts[old_line] == line_start - delta:
+                    lines += self.lines[old_line:]
+                    line_starts += [old_start + delta for old_start in self.line_starts[old_line:]]
+                    text_surfaces += self.text_surfaces[old_line:]
+                    break
+
+            lines.append(line)
+            line_starts.append(line_start)
+            text_surfaces += self.__render_lines([line])
+
+        self.lines = lines
+        self.line_starts = line_starts
+        self.text_surfaces = text_surfaces
 
     def __handle_editing_event(self, event: pygame.event.Event):
-        text_index = self.line_pos_to_text_pos[self.cursor_index[0]][self.cursor_index[1]]
+        text_index = self.__line_text_positions(self.cursor_index[0])[self.cursor_index[1]]
         move_cursor = None
         if event.key == pygame.K_BACKSPACE:
             if text_index > 0:
                 self.text = self.text[:text_index - 1] + self.text[text_index:]
+                self.__wrap_text_and_set_pos(text_index - 1, -1)
                 move_cursor = self.__handle_backspace
         elif len(repr(event.unicode)) > 2:
             number_of_chars = (len(self.lines) - 1) * self.max_chars_per_line + len(self.lines[-1]) - 1
@@ -183,9 +177,9 @@ class Textbox:
                 return
 
             self.text = self.text[:text_index] + event.unicode + self.text[text_index:]
+            self.__wrap_text_and_set_pos(text_index, len(event.unicode))
             move_cursor = partial(self.__move_cursor_right, prev_text_pos=text_index + 1)
 
-        self.__wrap_text_and_set_pos()
         if move_cursor:
             move_cursor()
 
@@ -194,6 +188,7 @@ class Textbox:
 
     def activate(self):
         self.active = True
+        self.dirty = True
         self.cursor_update_counter = 0
         self.is_cursor_visible = True
 
@@ -203,6 +198,7 @@ class Textbox:
             if self.cursor_update_counter >= Textbox.CURSOR_BLINK_PERIOD:
                 self.cursor_update_counter = 0
                 self.is_cursor_visible = not self.is_cursor_visible
+                self.dirty = True
 
     def draw(self, screen: pygame.Surface):
         pygame.draw.rect(screen, self.background_color, self.rect)
@@ -224,6 +220,13 @@ class Textbox:
 
             y_offset += text_surface.get_height() + Textbox.LINE_SPACING
 
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """Returns the areas of the screen that changed since the last call."""
+        if not self.dirty:
+            return []
+        self.dirty = False
+        return [self.rect]
+
     def lock(self):
         self.locked = True
 
@@ -1,3 +1,4 @@
+import math
 import random
 from copy import deepcopy
 
@@ -6,21 +7,22 @@ import pygame
 from utils import distance
 
 from .die import Die
+from .die_sprites import DieSprites
 
 
 class Dice:
     die_size = 64
     dice_gap = 16
     die_diag = die_size * (2**0.5)
+    # dice are thrown at multiples of this angle (in degrees), so that rotated sprites can be reused
+    rotation_step = 2.0
+    # number of rotated sprites kept in memory
+    sprite_cache_size = 128
+    # number of spots tried in each cell of the throw grid before moving to the next cell
+    spot_attempts = 4
 
     def __init__(self, game_bounds: pygame.Rect, dice_values: list[int] = None):
-        self.faces = [
-            pygame.transform.scale(
-                pygame.image.load(f"assets/dice/dice{i}.png").convert_alpha(),
-                (Dice.die_size, Dice.die_size),
-            )
-            for i in range(1, 7)
-        ]
+        self.sprites = DieSprites(Dice.die_size, Dice.rotation_step, Dice.sprite_cache_size)
 
         dice_start_x = game_bounds.center[0] - 4 * (Dice.die_size + Dice.dice_gap) // 2
 
@@ -45,10 +47,10 @@ class Dice:
         self.current_pos = 0
 
         if not dice_values:
-            self.dice = [Die(self.faces[i], i + 1, self.dice_pos[self.current_pos][i]) for i in range(5)]
+            self.dice = [Die(self.sprites, i + 1, self.dice_pos[self.current_pos][i]) for i in range(5)]
         else:
             self.dice = [
-                Die(self.faces[value - 1], value, self.dice_pos[self.current_pos][i])
+                Die(self.sprites, value, self.dice_pos[self.current_pos][i])
                 for i, value in enumerate(dice_values)
             ]
 
@@ -67,32 +69,87 @@ class Dice:
         self.throw_bounds.y += Dice.die_diag // 2
         self.throw_bounds.width -= Dice.die_diag
         self.throw_bounds.height -= Dice.die_diag
+        self.throw_cells = self.__get_throw_cells()
+
+    def __get_throw_cells(self) -> list[tuple[float, float, float, float]]:
+        """
+        Divides the throw area in a grid of cells at least a die diagonal wide and tall and returns
+        the area (x, y, width, height) of each cell where a die center can be placed, such that
+        dice placed in different cells never overlap.
+
+        The grid has (about) twice as many cells as there are dice, which leaves room around the
+        picked dice, and cells as large as possible, so that spots look random.
+        """
+        rows = max(1, int(self.throw_bounds.height // Dice.die_diag))
+        max_columns = max(1, int(self.throw_bounds.width // Dice.die_diag))
+        columns = min(max_columns, math.ceil(2 * len(self.dice) / rows))
+        cell_width = self.throw_bounds.width / columns
+        cell_height = self.throw_bounds.height / rows
+
+        # keep half a diagonal of margin inside each cell, towards every neighbouring cell
+        margin_x = min(Dice.die_diag, cell_width) / 2
+        margin_y = min(Dice.die_diag, cell_height) / 2
+
+        return [
+            (
+                self.throw_bounds.x + column * cell_width + margin_x,
+                self.throw_bounds.y + row * cell_height + margin_y,
+                cell_width - 2 * margin_x,
+                cell_height - 2 * margin_y,
+            )
+            for row in range(rows)
+            for column in range(columns)
+        ]
 
-    def __generate_spot(self):
+    @staticmethod
+    def __generate_spot(cell: tuple[float, float, float, float]):
+        x, y, width, height = cell
         return (
-            self.throw_bounds.x + self.throw_bounds.width * random.random(),
-            self.throw_bounds.y + self.throw_bounds.height * random.random(),
+            x + width * random.random(),
+            y + height * random.random(),
             360 * random.random(),
         )
 
     def __get_random_dice_throw(self):
-        spots = []
-        # make sure the generated dice don't overlap with the picked dice (which are not rerolled)
+        """
+        Returns a spot (x, y, rotation) for each die, picked dice (which are not rerolled) keep
+        theirs. Spots are sampled from a jittered grid, one per cell, so they never overlap each
+        other. Only the picked dice have to be avoided, with at most `spot_attempts` tries per
+        cell, so this always takes a bounded time. If the picked dice leave too little room, the
+        spots furthest away from them are used.
+        """
         picked_dice_pos = [die.throw_pos for die in self.dice if die.picked()]
+        spot_count = len(self.dice) - len(picked_dice_pos)
 
-        while len(spots) != len(self.dice):
-            new_spot = self.__generate_spot()
-            is_overlapping = False
-
-            for spot in spots + picked_dice_pos:
-                if distance(spot, new_spot) < Dice.die_diag:
-                    is_overlapping = True
+        spots = []
+        fallback_spots = []
+        for cell in random.sample(self.throw_cells, len(self.throw_cells)):
+            if len(spots) == spot_count:
+                break
+
+            best_spot, best_distance = None, -1.0
+            for _ in range(Dice.spot_attempts):
+                spot = self.__generate_spot(cell)
+                spot_distance = min((distance(pos, spot) for pos in picked_dice_pos), default=math.inf)
+                if spot_distance > best_distance:
+                    best_spot, best_distance = spot, spot_distance
+                if spot_distance >= Dice.die_diag:
                     break
 
-            if not is_overlapping:
-                spots.append(new_spot)
+            if best_distance >= Dice.die_diag:
+                spots.append(best_spot)
+            else:
+                fallback_spots.append((best_distance, best_spot))
+
+        fallback_spots.sort(key=lambda fallback_spot: fallback_spot[0], reverse=True)
+        spots += [spot for _, spot in fallback_spots[: spot_count - len(spots)]]
 
-        return spots
+        # only possible if the throw area has fewer cells than there are dice
+        while len(spots) < spot_count:
+            spots.append(self.__generate_spot(random.choice(self.throw_cells)))
+
+        spots = iter(spots)
+        return [die.throw_pos if die.picked() else next(spots) for die in self.dice]
 
     def click(self, mouse_pos: (int, int)):
         for die in self.dice:
@@ -106,6 +163,9 @@ class Dice:
         for die in self.dice:
             die.draw(screen)
 
+    def dirty_rects(self) -> list[pygame.Rect]:
+        return [rect for die in self.dice for rect in die.dirty_rects()]
+
     def throw(self, dice_values: list[int]):
         spots = self.__get_random_dice_throw()
         for value, die, spot in zip(dice_values, self.dice, spots):
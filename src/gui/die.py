@@ -1,17 +1,18 @@
 import pygame
 
-from constants import FPS
 from utils import point_in_convex_polygon
 
+from .animation import Tween, ease_in_cubic, ease_in_out_cubic, ease_out_cubic
+from .die_sprites import DieSprites
+
 
 class Die:
 
     def __init__(
         self,
-        image: pygame.Surface,
+        sprites: DieSprites,
         value: int,
         pos: tuple[float, float],
-        size: int = 64,
     ):
         # pre-allocated state instances
         self.idle_state = IdleDie(self)
@@ -22,9 +23,10 @@ class Die:
         self.state: DieState = self.idle_state
 
         # common attributes
-        self.image = image
+        self.sprites = sprites
+        self.image = sprites.get(value)
         self.value = value
-        self.size = size
+        self.size = size = sprites.size
         self.bounds = pygame.Rect(0, 0, size, size)
         self.bounds.center = (int(pos[0]), int(pos[1]))
         self.rotation = 0.0
@@ -33,6 +35,10 @@ class Die:
         self.throw_pos = (0.0, 0.0, 0.0)
         self.poly_bounds = self.get_updated_poly_bounds()
 
+        # what was drawn on the last frame, used to find out if the die must be redrawn
+        self.drawn_image: pygame.Surface | None = None
+        self.drawn_bounds: pygame.Rect | None = None
+
     def get_updated_poly_bounds(self):
         """Returns an array of vertices representing the corners of the die."""
         rect = pygame.Rect(0, 0, self.size, self.size)
@@ -51,25 +57,29 @@ class Die:
         return [(p.x, p.y) for p in poly]
 
     def update_image(self, rotation=0.0):
-        # kind of inefficient, the alternative would be to have a variable that stores the original
-        # loaded image and another that would represent the image to draw on-screen
-        #
-        # we'll see what MateI says
-
-        self.rotation = rotation
-        self.image = pygame.transform.scale(
-            pygame.image.load(f"assets/dice/dice{self.value}.png").convert_alpha(),
-            (self.size, self.size),
-        )
-
-        if rotation != 0.0:
-            self.image = pygame.transform.rotate(self.image, rotation)
+        # the rotation is quantized to the one of the cached sprite, so that the click bounds match
+        # what is drawn
+        self.rotation = self.sprites.quantize(rotation)
+        self.image = self.sprites.get(self.value, self.rotation)
 
         self.bounds.width = self.image.get_width()
         self.bounds.height = self.image.get_height()
 
     def draw(self, screen):
         screen.blit(self.image, self.bounds.topleft)
+        self.drawn_image = self.image
+        self.drawn_bounds = self.bounds.copy()
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """
+        Returns the areas of the screen that must be redrawn since the last time the die was drawn:
+        the area it was drawn in and the one it is in now, if it moved or its image changed.
+        """
+        if self.drawn_bounds is None:
+            return [self.bounds.copy()]
+        if self.drawn_image is self.image and self.drawn_bounds == self.bounds:
+            return []
+        return [self.drawn_bounds, self.bounds.copy()]
 
     def throw(self, new_value: int, off_screen_pos, throw_pos, throw_bounds):
         self.state.throw(new_value, off_screen_pos, throw_pos, throw_bounds)
@@ -128,77 +138,61 @@ class IdleDie(DieState):
 
 
 class ThrownDieAnimation(DieState):
+    # durations (in seconds) of the keyframes of the animation:
+    # - the dice leave the screen (speeding up)
+    # - the dice are thrown into the play area (slowing down)
+    OFF_SCREEN_DURATION = 0.5
+    THROW_DURATION = 0.3
 
     def __init__(
         self, parent: Die, off_screen_pos, throw_pos, throw_bounds: pygame.Rect
     ):
         self.parent = parent
 
-        # the keyframes of the animation (a tuple of form (duration in seconds, duration in frames)):
-        # - first item: off-screen animation
-        # - second item: "die throw" animation
-        self.keyframes = [(0.5, 0.5 * FPS), (0.3, 0.3 * FPS)]
-        self.frame_count = 0
-        self.curr_keyframe = 0
-
         self.off_screen_pos = off_screen_pos
 
         self.throw_bounds = throw_bounds
         self.throw_pos = throw_pos
 
-        self.vector = (
-            self.off_screen_pos[0] - self.parent.bounds.center[0],
-            self.off_screen_pos[1] - self.parent.bounds.center[1],
+        self.tween = Tween(
+            self.parent.bounds.center, self.off_screen_pos, ThrownDieAnimation.OFF_SCREEN_DURATION, ease_in_cubic
         )
+        self.curr_keyframe = 0
 
     def update(self, dt):
         """
         Performs the updates needed for one frame of the throw animation (i.e. moving the dice).
         """
-        duration, total_frames = self.keyframes[self.curr_keyframe]
-
-        if self.frame_count < total_frames:  # if current keyframe is still running
-            self.parent.bounds.topleft = (
-                self.parent.bounds.x + (self.vector[0] * dt / duration),
-                self.parent.bounds.y + (self.vector[1] * dt / duration),
-            )
-
-            self.frame_count += 1
-        else:  # if current keyframe ended, do different things depending on current keyframe
-            throw_x, throw_y, rot = self.throw_pos
+        time_left = self.tween.update(dt)
+        self.parent.bounds.center = self.tween.position
 
-            if self.curr_keyframe == 0:
-                # snap dice to their final position
-                self.parent.bounds.center = self.off_screen_pos
+        if not self.tween.finished:
+            return
 
-                # prepare direction vectors for the dice throw
-                self.vector = (
-                    throw_x - self.parent.bounds.center[0],
-                    throw_y - self.parent.bounds.center[1],
-                )
+        throw_x, throw_y, rot = self.throw_pos
 
-                # reset frame_count and move to next keyframe
-                self.frame_count = 0
-                self.curr_keyframe += 1
-            else:
-                # update dice values
-                # rotate the dice for a more realistic throw animation
-                self.parent.update_image(rot)
-                self.parent.throw_pos = self.throw_pos
-
-                # snap dice to their final position
-                self.parent.bounds.center = (throw_x, throw_y)
+        if self.curr_keyframe == 0:
+            # start the dice throw with the time left over from the off-screen animation
+            self.tween = Tween(
+                self.off_screen_pos, (throw_x, throw_y), ThrownDieAnimation.THROW_DURATION, ease_out_cubic
+            )
+            self.curr_keyframe += 1
+            self.update(time_left)
+        else:
+            # update dice values
+            # rotate the dice for a more realistic throw animation
+            self.parent.update_image(rot)
+            self.parent.throw_pos = self.throw_pos
 
-                # get the bounds of the rotated dice as a set of points of a polygon
-                # this is used in determining if a die is clicked
-                self.parent.poly_bounds = self.parent.get_updated_poly_bounds()
+            # snap dice to their final position
+            self.parent.bounds.center = (throw_x, throw_y)
 
-                # reset frame_count and curr_keyframe and stop the animation
-                self.frame_count = 0
-                self.curr_keyframe = 0
+            # get the bounds of the rotated dice as a set of points of a polygon
+            # this is used in determining if a die is clicked
+            self.parent.poly_bounds = self.parent.get_updated_poly_bounds()
 
-                # move to pickable state
-                self.parent.state = self.parent.pickable_state
+            # move to pickable state
+            self.parent.state = self.parent.pickable_state
 
     def in_animation(self) -> bool:
         return True
@@ -230,6 +224,8 @@ class PickableDie(DieState):
 
 
 class MovingDieAnimation(DieState):
+    # duration (in seconds) of the move
+    DURATION = 0.5
 
     def __init__(
         self,
@@ -244,48 +240,31 @@ class MovingDieAnimation(DieState):
         self.rotation = rotation
         self.final_state = final_state
 
-        # the keyframes of the animation (a tuple of form (duration in seconds, duration in frames)):
-        # - first item: off-screen animation
-        # - second item: "die throw" animation
-        self.keyframes = [(0.5, 0.5 * FPS)]
-        self.frame_count = 0
-        self.curr_keyframe = 0
-
-        self.vector = (
-            self.final_pos[0] - self.parent.bounds.center[0],
-            self.final_pos[1] - self.parent.bounds.center[1],
-        )
+        self.tween = Tween(self.parent.bounds.center, self.final_pos, MovingDieAnimation.DURATION, ease_in_out_cubic)
 
     def update(self, dt):
         """
         Performs the updates needed for one frame of the pick animation (i.e. moving the dice).
         """
-        duration, total_frames = self.keyframes[self.curr_keyframe]
+        self.tween.update(dt)
+        self.parent.bounds.center = self.tween.position
 
-        if self.frame_count < total_frames:  # if current keyframe is still running
-            self.parent.bounds.topleft = (
-                self.parent.bounds.x + (self.vector[0] * dt / duration),
-                self.parent.bounds.y + (self.vector[1] * dt / duration),
-            )
-
-            self.frame_count += 1
-        else:  # if current keyframe ended, do different things depending on current keyframe
-            # update dice values
-            # rotate the dice for a more realistic throw animation
-            self.parent.update_image(self.rotation)
+        if not self.tween.finished:
+            return
 
-            # snap dice to their final position
-            self.parent.bounds.center = self.final_pos
+        # update dice values
+        # rotate the dice for a more realistic throw animation
+        self.parent.update_image(self.rotation)
 
-            # get the bounds of the rotated dice as a set of points of a polygon
-            # this is used in determining if a die is clicked
-            self.parent.poly_bounds = self.parent.get_updated_poly_bounds()
+        # snap dice to their final position
+        self.parent.bounds.center = self.final_pos
 
-            # reset frame_count and curr_keyframe and stop the animation
-            self.frame_count = 0
+        # get the bounds of the rotated dice as a set of points of a polygon
+        # this is used in determining if a die is clicked
+        self.parent.poly_bounds = self.parent.get_updated_poly_bounds()
 
-            # move to picked state
-            self.parent.state = self.final_state
+        # move to picked state
+        self.parent.state = self.final_state
 
     def in_animation(self) -> bool:
         return True
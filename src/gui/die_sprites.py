@@ -0,0 +1,39 @@
+from functools import cached_property, lru_cache
+
+import pygame
+
+
+class DieSprites:
+    """
+    Sprites of a die, shared by all dice: the six faces scaled to `size` and their rotated variants.
+
+    Rotations are quantized to multiples of `rotation_step` degrees, so a rotated sprite can be
+    reused by every die thrown at (roughly) the same angle. Faces are loaded on first use and
+    rotated sprites are built on demand, keeping the `cache_size` most recently used ones.
+    """
+
+    def __init__(self, size: int, rotation_step: float = 2.0, cache_size: int = 128):
+        self.size = size
+        self.rotation_step = rotation_step
+        self.rotated = lru_cache(maxsize=cache_size)(self.__rotated)
+
+    @cached_property
+    def faces(self) -> list[pygame.Surface]:
+        return [
+            pygame.transform.scale(pygame.image.load(f"assets/dice/dice{i}.png").convert_alpha(), (self.size, self.size))
+            for i in range(1, 7)
+        ]
+
+    def quantize(self, rotation: float) -> float:
+        """Returns the angle (in [0, 360) degrees) of the sprite used for `rotation`."""
+        return round(rotation / self.rotation_step) * self.rotation_step % 360
+
+    def get(self, value: int, rotation: float = 0.0) -> pygame.Surface:
+        """Returns the sprite of face `value` rotated by `rotation` (see `quantize`)."""
+        rotation = self.quantize(rotation)
+        if rotation == 0.0:
+            return self.faces[value - 1]
+        return self.rotated(value, rotation)
+
+    def __rotated(self, value: int, rotation: float) -> pygame.Surface:
+        return pygame.transform.rotate(self.faces[value - 1], rotation)
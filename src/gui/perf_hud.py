@@ -0,0 +1,187 @@
+import json
+import platform
+import time
+from collections import deque
+from collections.abc import Callable
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+from gui.dialogue.gpt import GptResponse
+
+
+class PerfHud:
+    """
+    Overlay showing how long frames take and where the time goes: frame time percentiles, the
+    split between updating and drawing, the time spent by the AI players, the latency of chat
+    responses and the number of cached surfaces (as given by `counters`).
+
+    Every frame is recorded in a rolling trace of the last `trace_size` frames, which can be dumped
+    to a JSON file. Frames that ended by sleeping until the next event are marked as idle and left
+    out of the frame time statistics, since their length is not a stutter.
+    """
+
+    # columns of a frame in the trace (times in milliseconds, `start` in seconds since the game started)
+    TRACE_COLUMNS = ("start", "frame_ms", "update_ms", "draw_ms", "ai_ms", "idle")
+    PERCENTILES = (50, 95, 99)
+    # seconds between refreshes of the overlay, so that the numbers are readable and cheap to render
+    REFRESH_INTERVAL = 0.5
+    PADDING = 6
+    BACKGROUND_COLOR = (0, 0, 0, 190)
+    TEXT_COLOR = (255, 255, 255)
+
+    def __init__(
+        self,
+        pos: tuple[int, int],
+        font: pygame.font.Font,
+        counters: Callable[[], dict[str, int]] = dict,
+        trace_size: int = 3600,
+    ):
+        self.pos = pos
+        self.font = font
+        self.counters = counters
+        self.trace: deque[tuple] = deque(maxlen=trace_size)
+        self.visible = False
+
+        self.created = time.perf_counter()
+        self.frame_start: float | None = None
+        # time measured (see `measure`) during the current frame, by name
+        self.timings: dict[str, float] = {}
+        self.frame_work = 0.0
+        self.frame_idle = False
+
+        self.surface: pygame.Surface | None = None
+        self.bounds = pygame.Rect(pos, (0, 0))
+        self.last_refresh = 0.0
+        self.dirty = False
+
+    def begin_frame(self):
+        """Marks the start of a frame, which is also the end of the previous one."""
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            draw = self.timings.get("draw", 0.0)
+            self.trace.append(
+                (
+                    round(self.frame_start - self.created, 4),
+                    round((now - self.frame_start) * 1000, 3),
+                    round((self.frame_work - draw) * 1000, 3),
+                    round(draw * 1000, 3),
+                    round(self.timings.get("ai", 0.0) * 1000, 3),
+                    self.frame_idle,
+                )
+            )
+        self.frame_start = now
+        self.timings = {}
+
+    def end_frame(self, idle: bool = False):
+        """
+        Marks the end of the work of the current frame: the rest of it is spent waiting for the next
+        one (sleeping until the next event if `idle`).
+        """
+        if self.frame_start is None:
+            return
+        now = time.perf_counter()
+        self.frame_work = now - self.frame_start
+        self.frame_idle = idle
+
+        if self.visible and now - self.last_refresh >= PerfHud.REFRESH_INTERVAL:
+            self.last_refresh = now
+            self.__refresh()
+
+    @contextmanager
+    def measure(self, name: str):
+        """
+        Adds the time spent in the block to the timing `name` of the current frame ("draw" is split
+        from the rest of the frame, "ai" is reported on its own).
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.dirty = True
+        if self.visible:
+            self.last_refresh = time.perf_counter()
+            self.__refresh()
+
+    def lines(self) -> list[str]:
+        """Returns the lines of text shown by the overlay."""
+        frames = np.array([frame[1:5] for frame in self.trace if not frame[5]], dtype=float).reshape(-1, 4)
+        idle_frames = len(self.trace) - len(frames)
+        if len(frames):
+            frame_ms, update_ms, draw_ms, ai_ms = frames.T
+            percentiles = np.percentile(frame_ms, PerfHud.PERCENTILES)
+            lines = [
+                "frame ms "
+                + " ".join(f"p{p} {value:.1f}" for p, value in zip(PerfHud.PERCENTILES, percentiles))
+                + f" max {frame_ms.max():.1f}",
+                f"fps {1000 / frame_ms.mean():.0f} ({len(frames)} frames, {idle_frames} idle)",
+                f"update {update_ms.mean():.2f} ms, draw {draw_ms.mean():.2f} ms",
+                f"ai {ai_ms.mean():.2f} ms, max {ai_ms.max():.2f} ms",
+            ]
+        else:
+            lines = [f"no active frames ({idle_frames} idle)"]
+
+        latencies = list(GptResponse.latencies)
+        if latencies:
+            lines.append(f"chat latency p50 {np.median(latencies):.2f} s, max {max(latencies):.2f} s")
+        else:
+            lines.append("chat latency -")
+
+        lines.extend(f"{name}: {count}" for name, count in self.counters().items())
+        return lines
+
+    def __refresh(self):
+        text = [self.font.render(line, True, PerfHud.TEXT_COLOR) for line in self.lines()]
+        line_height = self.font.get_linesize()
+        surface = pygame.Surface(
+            (
+                max(line.get_width() for line in text) + 2 * PerfHud.PADDING,
+                line_height * len(text) + 2 * PerfHud.PADDING,
+            ),
+            pygame.SRCALPHA,
+        )
+        surface.fill(PerfHud.BACKGROUND_COLOR)
+        for i, line in enumerate(text):
+            surface.blit(line, (PerfHud.PADDING, PerfHud.PADDING + i * line_height))
+
+        self.surface = surface
+        self.dirty = True
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """Returns the areas of the screen that changed since the last call."""
+        if not self.dirty:
+            return []
+        self.dirty = False
+
+        # the area covered before the refresh must be redrawn as well, in case the overlay shrank
+        rects = [self.bounds]
+        self.bounds = pygame.Rect(self.pos, self.surface.get_size() if self.surface else (0, 0))
+        rects.append(self.bounds)
+        return rects
+
+    def draw(self, screen: pygame.Surface):
+        if self.visible and self.surface is not None:
+            screen.blit(self.surface, self.pos)
+
+    def dump(self, filepath: str, **meta):
+        """Writes the trace to `filepath` as JSON, along with the current counters and the given `meta` data."""
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "pygame": pygame.version.ver,
+                "platform": platform.platform(),
+                "video_driver": pygame.display.get_driver() if pygame.display.get_init() else None,
+                **meta,
+            },
+            "columns": PerfHud.TRACE_COLUMNS,
+            "frames": list(self.trace),
+            "chat_latencies_s": list(GptResponse.latencies),
+            "counters": self.counters(),
+        }
+        with open(filepath, "w") as file:
+            json.dump(report, file)
@@ -1,3 +1,5 @@
+from functools import cache
+
 import pygame
 
 from constants import CATEGORY_COUNT, ScoreCategory
@@ -126,8 +128,13 @@ class Sheet:
         self.cell_width = cell_width // 2
         self.cell_height = cell_height
 
-        self.score_text = []
-        self.score_text_rect = []
+        # (text, color) of the score cells of each player (None if never rendered) and their rendered text
+        self.score_cells: list[list[tuple[str, str] | None]] = [[None] * row_labels_len for _ in Sheet.col_labels]
+        self.score_text: list[list[tuple[pygame.Surface, pygame.Rect] | None]] = [
+            [None] * row_labels_len for _ in Sheet.col_labels
+        ]
+        # scores are rendered once per (text, color), a handful of glyphs cover a whole game
+        self.glyph = cache(self.__render_glyph)
 
         # subtract exterior borders
         self.bounds.x -= 2 * border_padding
@@ -135,12 +142,49 @@ class Sheet:
         self.bounds.width += 4 * border_padding
         self.bounds.height += 4 * border_padding
 
-    def __update_score_for_player(
+        # the background, grid and labels never change, so they are drawn once on their own surface
+        self.background = self.__render_background()
+        self.dirty_cells: list[pygame.Rect] = []
+        self.dirty = True
+
+    def __render_background(self) -> pygame.Surface:
+        background = pygame.Surface(self.bounds.size)
+        background.fill("white")
+        offset = pygame.math.Vector2(self.bounds.topleft)
+
+        for i, (start_pos, end_pos) in enumerate(self.lines):
+            # make the exterior borders (i < 4), border after the first six rows (i == 10),
+            # after sum and bonus (i == 12) and the border before total score (i == 19) bold
+            pygame.draw.line(
+                background,
+                "black",
+                start_pos - offset,
+                end_pos - offset,
+                2 if i < 4 or i == 10 or i == 12 or i == 19 else 1,
+            )
+
+        for text, text_rect in zip(self.text, self.text_rect):
+            background.blit(text, text_rect.move(-offset))
+
+        return background
+
+    def __render_glyph(self, text: str, color: str) -> pygame.Surface:
+        return self.font.render(text, True, color)
+
+    def __cell_rect(self, row: int, column_index: int) -> pygame.Rect:
+        return pygame.Rect(
+            self.cells_bounds.x + self.cell_width * column_index,
+            self.cells_bounds.y + row * self.cell_height,
+            self.cell_width,
+            self.cell_height,
+        )
+
+    def __score_cells_for_player(
         self,
-        column_index: int,
         player_scores: list[int],
         obtained_scores: list[int],
-    ):
+    ) -> list[tuple[str, str]]:
+        """Returns the (text, color) of every score cell of a player, from top to bottom."""
         is_0_only_obtainable_score = all(
             obtained_score == 0
             for obtained_score, player_score in zip(obtained_scores, player_scores)
@@ -160,7 +204,7 @@ class Sheet:
         player_scores = player_scores[:6] + [sum_first_6_rows, bonus_first_6_rows] + player_scores[6:]
         obtained_scores = obtained_scores[:6] + [0, 0] + obtained_scores[6:]
 
-        # update the text elements of the sheet
+        cells = []
         for i, (existing_score, possible_score) in enumerate(zip(player_scores, obtained_scores)):
             # black is used for picked fields, red for pickable fields
             color = "black"
@@ -182,26 +226,14 @@ class Sheet:
                 # render possible_score in only if it is non zero or if it is zero and zero is the only possible value
                 display_number = str(possible_score) if possible_score > 0 or (possible_score == 0 and is_0_only_obtainable_score) else ""
 
-            self.score_text.append(self.font.render(display_number, True, color))
-            rect = self.score_text[i].get_rect()
-            rect.x = self.cells_bounds.x + self.cell_width * column_index + 8
-            rect.center = (
-                rect.center[0],
-                self.cells_bounds.y + i * self.cell_height + self.cell_height // 2,
-            )
-            self.score_text_rect.append(rect)
+            cells.append((display_number, color))
 
         # update total
         total_score = str(sum(score for score in player_scores[:6] + player_scores[7:] if score != ScoreCategory.UNSELECTED.value))
 
-        self.score_text.append(self.font.render(total_score, True, "black"))
-        rect = self.score_text[-1].get_rect()
-        rect.x = self.cells_bounds.x + self.cell_width * column_index + 8
-        rect.center = (
-            rect.center[0],
-            self.cells_bounds.y + (len(self.row_labels) - 1) * self.cell_height + self.cell_height // 2,
-        )
-        self.score_text_rect.append(rect)
+        cells.append((total_score, "black"))
+
+        return cells
 
     def update_score(self, state: GameState, after_roll=False):
         """
@@ -211,36 +243,42 @@ class Sheet:
         2. A category selection happened, which means no obtained scores should be rendered and
         the picked cell should be drawn using black text.
         """
-        self.score_text.clear()
-        self.score_text_rect.clear()
-
         obtained_scores = score_roll(state.dice) if after_roll else [-1] * CATEGORY_COUNT
         for player_index, player_state in enumerate(state.player_states):
-            self.__update_score_for_player(
-                player_index,
+            cells = self.__score_cells_for_player(
                 player_state.scores,
                 obtained_scores if player_index == state.current_player else [-1] * CATEGORY_COUNT,
             )
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, "white", self.bounds)
+            # only the cells whose text or color changed are rendered (and redrawn) again
+            for row, cell in enumerate(cells):
+                if cell == self.score_cells[player_index][row]:
+                    continue
 
-        for i, (start_pos, end_pos) in enumerate(self.lines):
-            # make the exterior borders (i < 4), border after the first six rows (i == 10),
-            # after sum and bonus (i == 12) and the border before total score (i == 19) bold
-            pygame.draw.line(
-                screen,
-                "black",
-                start_pos,
-                end_pos,
-                2 if i < 4 or i == 10 or i == 12 or i == 19 else 1,
-            )
+                cell_rect = self.__cell_rect(row, player_index)
+                text = self.glyph(*cell)
+                rect = text.get_rect()
+                rect.x = cell_rect.x + 8
+                rect.center = (rect.center[0], cell_rect.center[1])
 
-        for text, text_rect in zip(self.text, self.text_rect):
-            screen.blit(text, text_rect)
+                self.score_cells[player_index][row] = cell
+                self.score_text[player_index][row] = (text, rect)
+                self.dirty_cells.append(cell_rect)
 
-        for text, text_rect in zip(self.score_text, self.score_text_rect):
-            screen.blit(text, text_rect)
+    def draw(self, screen):
+        screen.blit(self.background, self.bounds.topleft)
+
+        for column in self.score_text:
+            for score_text in column:
+                if score_text is not None:
+                    screen.blit(*score_text)
+
+    def dirty_rects(self) -> list[pygame.Rect]:
+        """Returns the areas of the screen that changed since the last call."""
+        dirty_rects = [self.bounds] if self.dirty else self.dirty_cells
+        self.dirty = False
+        self.dirty_cells = []
+        return dirty_rects
 
     def clicked(self, pos):
         x, y = pos
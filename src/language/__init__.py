@@ -0,0 +1,3 @@
+from .models import Models, ModelNotCachedError
+from .pipeline import KeywordCollector, detect_language, extract_keywords, replace_words
+from .stylometry import StyleProfile, merge_profiles, profile_lines
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from .models import Models
+from .pipeline import (
+    KeywordCollector,
+    detect_language,
+    keywords_with_meanings,
+    parse_stream,
+    replace_words_stream,
+    split_text,
+)
+from .stylometry import profile_lines
+from .wordnet import WordNetIndex
+
+# bump whenever a change in the pipeline changes its results, so that cached results are discarded
+PIPELINE_VERSION = f"2.wordnet{WordNetIndex.VERSION}"
+
+STAGES = ["stylometry", "replace", "keywords", "generate"]
+
+# default number of worker processes with the generate stage, each of which loads the ~3 GB generation model
+GENERATE_WORKERS = 2
+
+
+def iter_documents(path: str) -> Iterator[tuple[str, str]]:
+    """
+    Yield `(id, text)` pairs for the documents in `path`, which is either a directory (every `.txt`
+    file in it, recursively, is a document identified by its relative path) or a JSONL file with
+    one `{"id": ..., "text": ...}` object per line.
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.endswith(".txt"):
+                    file_path = os.path.join(root, filename)
+                    with open(file_path, encoding="utf8") as file:
+                        yield os.path.relpath(file_path, path), file.read()
+        return
+
+    with open(path, encoding="utf8") as file:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                document = json.loads(line)
+                yield str(document.get("id", line_number)), document["text"]
+
+
+class ResultCache:
+    """
+    On-disk cache of per-document results, keyed by the hash of the document text, the pipeline
+    version and the options the document was processed with.
+    """
+
+    def __init__(self, cache_dir: str, options: dict):
+        self.cache_dir = cache_dir
+        self.options_key = json.dumps({"version": PIPELINE_VERSION, **options}, sort_keys=True)
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.options_key}\0{text}".encode("utf8")).hexdigest()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self.__path(key), encoding="utf8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, result: dict):
+        path = self.__path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf8") as file:
+            json.dump(result, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def analyse_document(text: str, models: Models, stages: list[str], options: dict) -> dict:
+    """
+    Run the given pipeline `stages` on `text` and return their results.
+    """
+    text = text.strip()
+    lines = text.splitlines()
+    result = {}
+
+    if "stylometry" in stages:
+        result["language"] = detect_language(text[:5000])[0] if text else None
+        result["stylometry"] = json.loads(profile_lines(lines, models).to_json())
+
+    # entities are collected from the parse made for word replacement, if there is one
+    keywords = KeywordCollector() if "keywords" in stages or "generate" in stages else None
+
+    if "replace" in stages:
+        result["replaced"] = "\n".join(replace_words_stream(split_text(lines, models), models, keywords=keywords))
+    elif keywords is not None:
+        for doc in parse_stream(split_text(lines, models), models):
+            keywords.add(doc)
+
+    if keywords is not None:
+        meanings = keywords_with_meanings(keywords, models, options.get("max_keywords", 10))
+        result["keywords"] = meanings
+
+        if "generate" in stages:
+            from .generation import generate_sentences
+
+            result["sentences"] = generate_sentences(meanings, models)
+
+    return result
+
+
+# state of a worker process, loaded once by `_init_worker`
+_worker: dict = {}
+
+
+def _init_worker(cache_dir: str, offline: bool, quantize: bool, stages: list[str], options: dict, workers: int):
+    if "generate" in stages:
+        from .generation import configure_torch
+
+        # the workers generate concurrently, so they split the cores instead of each using all of them
+        configure_torch(max(1, (os.cpu_count() or 1) // workers))
+    _worker["models"] = Models(cache_dir, offline=offline, quantize=quantize)
+    _worker["stages"] = stages
+    _worker["options"] = options
+
+
+def _analyse(text: str) -> dict:
+    return analyse_document(text, _worker["models"], _worker["stages"], _worker["options"])
+
+
+def analyse_documents(
+    documents: Iterator[tuple[str, str]],
+    *,
+    stages: list[str],
+    options: dict | None = None,
+    models_dir: str,
+    results_dir: str | None = None,
+    offline: bool = False,
+    quantize: bool = False,
+    workers: int | None = None,
+) -> Iterator[tuple[str, dict, bool]]:
+    """
+    Analyse `documents` over a pool of `workers` processes, each of which loads the models once,
+    and yield `(id, result, cached)` triples in input order. There are as many workers as CPUs by
+    default, or `GENERATE_WORKERS` with the generate stage.
+
+    Results are cached in `results_dir` (if given), so that only new or changed documents are
+    processed again.
+    """
+    options = options or {}
+    # the quantized generation model gives different results, so it must not share cached results
+    cache_options = {"stages": sorted(stages), "quantize": quantize, **options}
+    cache = ResultCache(results_dir, cache_options) if results_dir else None
+
+    documents = list(documents)
+    keys = [cache.key(text) if cache else None for _, text in documents]
+    cached_results = [cache.get(key) if cache else None for key in keys]
+    missing = [text for (_, text), result in zip(documents, cached_results) if result is None]
+
+    executor = None
+    computed_results = iter(())
+    if missing:
+        cpus = os.cpu_count() or 1
+        workers = min(workers or (min(GENERATE_WORKERS, cpus) if "generate" in stages else cpus), len(missing))
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(models_dir, offline, quantize, stages, options, workers),
+        )
+        computed_results = executor.map(_analyse, missing)
+
+    try:
+        for (document_id, _), key, result in zip(documents, keys, cached_results):
+            if result is not None:
+                yield document_id, result, True
+                continue
+
+            result = next(computed_results)
+            if cache:
+                cache.put(key, result)
+            yield document_id, result, False
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,229 @@
+import queue
+import random
+import re
+import threading
+from collections.abc import Iterator
+from functools import cache
+
+import torch
+from transformers import StoppingCriteria, StoppingCriteriaList
+
+from .models import Models
+from .profiling import stage
+
+SENTENCE_TERMINATORS = {".", "?", "!"}
+
+
+def configure_torch(threads: int | None = None, interop_threads: int | None = None, workers: int = 1):
+    """
+    Set the number of threads torch uses for intra-op and inter-op parallelism. `interop_threads`
+    can only be changed before torch runs any parallel work, so call this before loading models.
+    Unless `threads` is given, the intra-op threads are split between the `workers` threads that
+    run the model concurrently (see `iter_sentences`), so that they do not oversubscribe the cores.
+    """
+    if threads is None and workers > 1:
+        threads = max(1, torch.get_num_threads() // workers)
+    if threads is not None:
+        torch.set_num_threads(threads)
+    if interop_threads is not None:
+        torch.set_num_interop_threads(interop_threads)
+
+
+def seed_generation(seed: int | None = None) -> int:
+    """
+    Seed torch with `seed`, or a random seed if none is given.
+    """
+    if seed is None:
+        seed = random.randint(0, 2**32 - 1)
+    torch.manual_seed(seed)
+    torch.cuda.manual_seed_all(seed)
+    return seed
+
+
+@cache
+def terminator_token_ids(tokenizer) -> torch.Tensor:
+    """
+    Return the ids of all tokens containing a sentence terminator.
+    """
+    return torch.tensor(
+        [
+            token_id
+            for token, token_id in tokenizer.get_vocab().items()
+            if any(c in tokenizer.convert_tokens_to_string([token]) for c in SENTENCE_TERMINATORS)
+        ]
+    )
+
+
+class FirstSentenceStoppingCriteria(StoppingCriteria):
+    """
+    Stop generating once every sequence in the batch has produced a sentence terminator, or
+    ended (EOS, after which it is padded) before producing one.
+    """
+
+    def __init__(self, tokenizer, prompt_length: int, batch_size: int):
+        self.prompt_length = prompt_length
+        # a generation step then only needs to look up the last token of each sequence
+        end_ids = [token_id for token_id in (tokenizer.eos_token_id, tokenizer.pad_token_id) if token_id is not None]
+        self.stop_ids = torch.cat([terminator_token_ids(tokenizer), torch.tensor(end_ids, dtype=torch.long)])
+        self.finished = torch.zeros(batch_size, dtype=torch.bool)
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> bool:
+        if input_ids.shape[1] > self.prompt_length:
+            self.finished |= torch.isin(input_ids[:, -1], self.stop_ids)
+        return bool(self.finished.all())
+
+
+def build_prompt(keyword: str, meaning: str | None) -> str:
+    prompt = f'O propoziție conținând cuvântul "{keyword}"'
+    if meaning is not None:
+        prompt += f', cuvânt care are definiția "{meaning}"'
+    prompt += ", este:"
+    return prompt
+
+
+def extract_sentence(generated_text: str) -> str:
+    """
+    Return the first (possibly quoted) sentence of `generated_text`.
+    """
+    generated_text = generated_text.strip()
+    sentence_match = re.match(r'(\"([^"]+)\")|([^.?!]*[.?!])', generated_text)
+    if not sentence_match:
+        return generated_text
+
+    sentence = sentence_match.group(0).strip('"')
+    if sentence[-1] not in SENTENCE_TERMINATORS:
+        sentence += "."
+    return sentence
+
+
+def _generate_batch(batch: list[tuple[str, str | None]], inputs, tokenizer, model, max_new_tokens: int):
+    """
+    Generate the continuations of a batch of tokenized prompts and return their new tokens.
+    """
+    prompt_length = inputs["input_ids"].shape[1]
+
+    with torch.inference_mode():
+        output = model.generate(
+            **inputs,
+            max_new_tokens=max_new_tokens,
+            no_repeat_ngram_size=2,
+            stopping_criteria=StoppingCriteriaList(
+                [FirstSentenceStoppingCriteria(tokenizer, prompt_length, len(batch))]
+            ),
+        )
+
+    return output[:, prompt_length:]
+
+
+def iter_sentences(
+    keywords_with_meanings: dict[str, str | None],
+    models: Models,
+    *,
+    batch_size: int = 8,
+    max_new_tokens: int = 96,
+    workers: int = 1,
+    queue_size: int | None = None,
+) -> Iterator[tuple[str, str]]:
+    """
+    Generate one sentence for each keyword (with the given meaning, if any) using GPT-Neo and yield
+    `(keyword, sentence)` pairs as soon as they are ready (not necessarily in keyword order).
+
+    Prompts are generated `batch_size` at a time (left padded, so that every prompt ends right
+    before the generated tokens) and each batch stops as soon as all of its sequences completed
+    their first sentence.
+
+    Batches are tokenized by a producer thread into a queue of at most `queue_size` batches
+    (2 per worker by default), from which `workers` threads run the model concurrently (torch
+    releases the GIL). The tokenizer is only used by the producer and the calling thread.
+    """
+    tokenizer, model = models.gpt
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    keywords = list(keywords_with_meanings.items())
+    batches: queue.Queue = queue.Queue(maxsize=queue_size or 2 * workers)
+    results: queue.Queue = queue.Queue()
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # block while the queue is full, unless the consumer went away
+        while not stopped.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for i in range(0, len(keywords), batch_size):
+                batch = keywords[i : i + batch_size]
+                prompts = [build_prompt(keyword, meaning) for keyword, meaning in batch]
+                inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+                if not put((batch, inputs)):
+                    return
+        except Exception as e:
+            # raised by the consumer like the errors of the workers, before they run out of batches
+            results.put(([], e))
+        finally:
+            for _ in range(workers):
+                put(None)
+
+    def work():
+        while not stopped.is_set():
+            try:
+                item = batches.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+
+            batch, inputs = item
+            try:
+                results.put((batch, _generate_batch(batch, inputs, tokenizer, model, max_new_tokens)))
+            except Exception as e:
+                results.put((batch, e))
+        results.put(None)
+
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        finished_workers = 0
+        while finished_workers < workers:
+            result = results.get()
+            if result is None:
+                finished_workers += 1
+                continue
+
+            batch, generated = result
+            if isinstance(generated, Exception):
+                raise generated
+            for (keyword, _), tokens in zip(batch, generated):
+                yield keyword, extract_sentence(tokenizer.decode(tokens, skip_special_tokens=True))
+    finally:
+        stopped.set()
+
+
+def generate_sentences(
+    keywords_with_meanings: dict[str, str | None],
+    models: Models,
+    *,
+    batch_size: int = 8,
+    max_new_tokens: int = 96,
+    workers: int = 1,
+) -> dict[str, str]:
+    """
+    Generate one sentence for each keyword (see `iter_sentences`) and return them in keyword order.
+    """
+    with stage("generate"):
+        sentences = dict(
+            iter_sentences(
+                keywords_with_meanings, models, batch_size=batch_size, max_new_tokens=max_new_tokens, workers=workers
+            )
+        )
+    return {keyword: sentences[keyword] for keyword in keywords_with_meanings}
@@ -0,0 +1,41 @@
+from collections.abc import Iterable
+
+from .wordnet import Sense, WordNetIndex, normalize_words
+
+
+class Lesk:
+    """
+    Simplified Lesk algorithm, used to find the meaning of a word in RoWordNet most similar to the
+    context (sentence/paragraph) it is used in.
+
+    Candidate senses come from the `WordNetIndex` with their definitions already tokenized and
+    normalized, so scoring a candidate is a single set intersection. Candidates are cached per
+    word and fetched for a whole batch of words at once by `disambiguate_all`.
+    """
+
+    def __init__(self, index: WordNetIndex):
+        self.index = index
+        self.senses: dict[str, tuple[Sense, ...]] = {}
+
+    def disambiguate_all(self, items: Iterable[tuple[str, Iterable[str]]]) -> list[Sense | None]:
+        """
+        Return the best matching sense (or None if the word is not in RoWordNet) for each
+        `(word, context words)` pair of `items`.
+        """
+        items = list(items)
+
+        missing = {word for word, _ in items if word not in self.senses}
+        if missing:
+            self.senses.update(self.index.senses(missing))
+
+        return [self.__best_sense(self.senses[word], normalize_words(context)) for word, context in items]
+
+    def disambiguate(self, word: str, context: Iterable[str]) -> Sense | None:
+        return self.disambiguate_all([(word, context)])[0]
+
+    @staticmethod
+    def __best_sense(senses: tuple[Sense, ...], context: frozenset[str]) -> Sense | None:
+        if not senses:
+            return None
+        # ties are broken by synset id, like the original implementation did
+        return max(senses, key=lambda sense: (len(context & sense[2]), sense[0]))
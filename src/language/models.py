@@ -0,0 +1,145 @@
+import os
+from functools import cached_property
+
+from .profiling import profiled
+
+SPACY_MODEL = "ro_core_news_sm"
+GPT_MODEL = "dumitrescustefan/gpt-neo-romanian-780m"
+NLTK_RESOURCES = {"punkt_tab": "tokenizers/punkt_tab"}
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "NLP_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "ai-yahtzee", "nlp")
+)
+
+
+class ModelNotCachedError(RuntimeError):
+    """
+    Raised in offline mode when a model is not present in the local cache.
+    """
+
+    def __init__(self, name: str, cache_dir: str):
+        super().__init__(f"Model '{name}' is not cached in '{cache_dir}' and offline mode is enabled")
+
+
+class Models:
+    """
+    Container for the models used by the NLP pipeline. Nothing is imported or loaded until the
+    corresponding attribute is accessed for the first time, so a stage only pays for the models it
+    actually uses.
+
+    Downloaded models are stored in `cache_dir`. In `offline` mode the network is never touched and
+    a missing model raises `ModelNotCachedError` instead. With `quantize`, the linear layers of the
+    generation model are dynamically quantized to int8, which is a lot faster on CPU.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, offline: bool = False, quantize: bool = False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.quantize = quantize
+
+        if offline:
+            # make sure huggingface never tries to reach the hub, not even for metadata
+            os.environ["HF_HUB_OFFLINE"] = "1"
+            os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    def __path(self, *parts: str) -> str:
+        return os.path.join(self.cache_dir, *parts)
+
+    @cached_property
+    @profiled("load:nltk")
+    def nltk(self):
+        """The `nltk` module, with the required resources available in the cache."""
+        import nltk
+
+        nltk_dir = self.__path("nltk")
+        if nltk_dir not in nltk.data.path:
+            nltk.data.path.insert(0, nltk_dir)
+
+        for name, resource in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                if self.offline:
+                    raise ModelNotCachedError(name, nltk_dir) from None
+                if not nltk.download(name, download_dir=nltk_dir, quiet=True):
+                    raise RuntimeError(f"Could not download nltk resource '{name}'")
+
+        return nltk
+
+    @cached_property
+    @profiled("load:spacy")
+    def spacy(self):
+        """The romanian spaCy pipeline."""
+        import spacy
+
+        spacy_dir = self.__path("spacy", SPACY_MODEL)
+        if os.path.isdir(spacy_dir):
+            return spacy.load(spacy_dir)
+
+        if not spacy.util.is_package(SPACY_MODEL):
+            if self.offline:
+                raise ModelNotCachedError(SPACY_MODEL, spacy_dir)
+
+            from spacy.cli import download
+
+            download(SPACY_MODEL)
+
+        nlp = spacy.load(SPACY_MODEL)
+        os.makedirs(os.path.dirname(spacy_dir), exist_ok=True)
+        nlp.to_disk(spacy_dir)
+        return nlp
+
+    @cached_property
+    @profiled("load:rown")
+    def rown(self):
+        """The romanian WordNet (shipped with the `rowordnet` package)."""
+        import rowordnet
+
+        return rowordnet.RoWordNet()
+
+    @cached_property
+    @profiled("load:wordnet")
+    def wordnet(self):
+        """
+        The `WordNetIndex` of RoWordNet, built (from the bundled RoWordNet, no download needed) on
+        first use and stored in the cache afterwards.
+        """
+        from .wordnet import WordNetIndex
+
+        path = self.__path(f"rowordnet-index-v{WordNetIndex.VERSION}.sqlite")
+        if os.path.isfile(path):
+            return WordNetIndex(path)
+        return WordNetIndex.build(self.rown, path)
+
+    @cached_property
+    @profiled("load:lesk")
+    def lesk(self):
+        """A `Lesk` disambiguator backed by the RoWordNet index."""
+        from .lesk import Lesk
+
+        return Lesk(self.wordnet)
+
+    @cached_property
+    @profiled("load:gpt")
+    def gpt(self):
+        """A `(tokenizer, model)` pair for the romanian GPT-Neo model used for sentence generation."""
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        hf_dir = self.__path("huggingface")
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(GPT_MODEL, cache_dir=hf_dir, local_files_only=self.offline)
+            model = AutoModelForCausalLM.from_pretrained(GPT_MODEL, cache_dir=hf_dir, local_files_only=self.offline)
+        except OSError as e:
+            if self.offline:
+                raise ModelNotCachedError(GPT_MODEL, hf_dir) from e
+            raise
+
+        model.generation_config.pad_token_id = model.generation_config.eos_token_id
+        model.eval()
+
+        if self.quantize:
+            import torch
+
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+        return tokenizer, model
@@ -0,0 +1,203 @@
+import random
+from collections import Counter
+from collections.abc import Iterable, Iterator
+
+from .models import Models
+from .profiling import profiled, stage
+
+# pipeline components that the word replacement stage does not need
+REPLACE_DISABLED_PIPES = ("parser", "ner")
+
+
+@profiled("langdetect")
+def detect_language(text: str) -> tuple[str, str | None]:
+    """
+    Return the ISO 639-1 code of the language of `text` and its name (if known).
+    """
+    import pycountry
+    from langdetect import detect
+
+    lang = detect(text)
+    lang_name = pycountry.languages.get(alpha_2=lang)
+    return lang, lang_name.name if lang_name else None
+
+
+def append_word_with_space(arr: list[str], word: str, pos=None):
+    if pos != "PUNCT" and len(arr) > 0 and word[0] != "-" and arr[-1][-1] != "-":
+        arr.append(" ")
+    arr.append(word)
+
+
+@profiled("replace")
+def replace_words(doc, models: Models) -> str:
+    """
+    Replace roughly one in five words of the parsed `doc` with a synonym, hypernym or negated
+    antonym found in RoWordNet.
+    """
+    lookup = models.wordnet.lookup
+    replaced_words: list[str] = []
+
+    for token in doc:
+        synonyms, hypernyms, not_antonyms = lookup(token.lemma_, token.pos_)
+
+        text = token.text.strip()
+        possible_words = [*(literal for literal in synonyms if literal.strip() != text), *hypernyms, *not_antonyms]
+        if not possible_words or random.randint(0, 4) != 0:
+            append_word_with_space(replaced_words, token.text, token.pos_)
+            continue
+
+        final_word = (
+            possible_words[random.randint(0, len(possible_words) - 1) if len(possible_words) > 1 else 0]
+            .replace("_", " ")
+            .replace("[", "")
+            .replace("]", "")
+            .replace("|", "")
+        )
+        append_word_with_space(replaced_words, final_word, token.pos_)
+
+    return "".join(replaced_words)
+
+
+def split_text(lines: Iterable[str], models: Models, unit: str = "paragraph") -> Iterator[str]:
+    """
+    Lazily split a stream of lines into chunks for `replace_words_stream`. Every non-empty line is
+    a paragraph; with `unit="sentence"` paragraphs are further split into sentences.
+    """
+    for line in lines:
+        paragraph = line.strip()
+        if not paragraph:
+            continue
+
+        if unit == "sentence":
+            yield from models.nltk.sent_tokenize(paragraph)
+        else:
+            yield paragraph
+
+
+def parse_stream(
+    chunks: Iterable[str], models: Models, *, batch_size: int = 64, n_process: int = 1, disable: Iterable[str] = ()
+) -> Iterator:
+    """
+    Parse `chunks` in batches with `nlp.pipe` (using `n_process` worker processes, with the
+    `disable`d pipeline components turned off) and yield their docs as soon as they are ready. Only
+    one batch per process is kept in memory at any time.
+    """
+    nlp = models.spacy
+    disabled = [name for name in disable if name in nlp.pipe_names]
+
+    with nlp.select_pipes(disable=disabled):
+        docs = nlp.pipe(chunks, batch_size=batch_size, n_process=n_process)
+        while True:
+            with stage("spacy"):
+                doc = next(docs, None)
+            if doc is None:
+                break
+            yield doc
+
+
+def replace_words_stream(
+    chunks: Iterable[str],
+    models: Models,
+    *,
+    batch_size: int = 64,
+    n_process: int = 1,
+    keywords: "KeywordCollector | None" = None,
+) -> Iterator[str]:
+    """
+    Streaming version of `replace_words`: yield the text of each of `chunks`, with words replaced,
+    as soon as it is parsed (see `parse_stream`). If a `keywords` collector is given, the entities of
+    each chunk are collected from the same parse.
+    """
+    disable = () if keywords is not None else REPLACE_DISABLED_PIPES
+
+    for doc in parse_stream(chunks, models, batch_size=batch_size, n_process=n_process, disable=disable):
+        if keywords is not None:
+            keywords.add(doc)
+        yield replace_words(doc, models)
+
+
+def context_words(span) -> list[str]:
+    """
+    Return the words of a spaCy `span` that are relevant as Lesk context (no stop words or punctuation).
+    """
+    return [token.text for token in span if not token.is_stop and not token.is_punct and not token.is_space]
+
+
+class KeywordCollector:
+    """
+    Collects the named entities of one or more parsed docs (e.g. the chunks of a streamed document)
+    and ranks them as keywords of the whole document. Entities are deduplicated by lemma and ranked
+    by number of mentions, then by first mention.
+    """
+
+    # numeric and time entities are rarely meaningful keywords
+    IGNORED_LABELS = {"DATETIME", "PERIOD", "NUMERIC_VALUE", "ORDINAL", "MONEY", "QUANTITY"}
+    # sentences kept per entity as Lesk context, so memory stays bounded on large documents
+    MAX_CONTEXTS = 5
+
+    def __init__(self) -> None:
+        self.entities: dict[str, dict] = {}
+
+    def add(self, doc):
+        has_sentences = doc.has_annotation("SENT_START")
+
+        for entity in doc.ents:
+            if entity.label_ in KeywordCollector.IGNORED_LABELS:
+                continue
+
+            lemma = (entity.lemma_ or entity.text).lower()
+            if lemma not in self.entities:
+                self.entities[lemma] = {
+                    "lemma": entity.lemma_ or entity.text,
+                    "count": 0,
+                    "texts": Counter(),
+                    "contexts": [],
+                }
+
+            stats = self.entities[lemma]
+            stats["count"] += 1
+            stats["texts"][entity.text] += 1
+            if len(stats["contexts"]) < KeywordCollector.MAX_CONTEXTS:
+                stats["contexts"].append(context_words(entity.sent if has_sentences else doc))
+
+    def ranked(self, top: int | None = None) -> list[tuple[str, str, list[str]]]:
+        """
+        Return the `top` keywords as `(text, lemma, context words)` triples, best ranked first. The
+        text of a keyword is its most frequent mention.
+        """
+        # entities are stored in order of first mention and sorting is stable
+        ranked = sorted(self.entities.values(), key=lambda stats: -stats["count"])[:top]
+        return [
+            (
+                stats["texts"].most_common(1)[0][0],
+                stats["lemma"],
+                [word for context in stats["contexts"] for word in context],
+            )
+            for stats in ranked
+        ]
+
+
+def keywords_with_meanings(keywords: KeywordCollector, models: Models, top: int | None = None) -> dict[str, str | None]:
+    """
+    Return the `top` keywords collected by `keywords` mapped to their RoWordNet definition (as
+    disambiguated by Lesk, with all sentences mentioning them as context), or None if the keyword
+    is not in RoWordNet.
+    """
+    ranked = keywords.ranked(top)
+
+    lesk = models.lesk
+    with stage("lesk"):
+        senses = lesk.disambiguate_all((lemma, context) for _, lemma, context in ranked)
+
+    return {text: sense[1] if sense else None for (text, _, _), sense in zip(ranked, senses)}
+
+
+def extract_keywords(docs: Iterable, models: Models, top: int | None = None) -> dict[str, str | None]:
+    """
+    Return the `top` keywords (named entities, see `KeywordCollector`) of the already parsed `docs`
+    of a document, mapped to their RoWordNet definition (see `keywords_with_meanings`).
+    """
+    keywords = KeywordCollector()
+    for doc in docs:
+        keywords.add(doc)
+    return keywords_with_meanings(keywords, models, top)
@@ -0,0 +1,127 @@
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_NO_STAGE = nullcontext()
+_active_profiler: "StageProfiler | None" = None
+
+
+def peak_rss_mb() -> float | None:
+    """Return the peak resident set size of this process so far, in MiB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB everywhere else
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class StageProfiler:
+    """
+    Collects the time (wall and CPU) and peak memory used by each stage of the pipeline. Stages are
+    marked with `stage(name)`; the same stage can run many times (e.g. once per chunk) and its
+    measurements are accumulated. Measurements of a stage include those of the stages nested in it
+    (e.g. a model loaded on first use).
+
+    Peak memory is tracked as the peak RSS of the process after each stage (which includes native
+    allocations of spaCy and torch) and, with `trace_python_memory`, as the peak of the memory
+    allocated by Python during the stage (more precise, but slows everything down).
+    """
+
+    def __init__(self, trace_python_memory: bool = False):
+        self.trace_python_memory = trace_python_memory
+        self.stages: dict[str, dict] = {}
+        self.__open_stages: list[dict] = []
+        self.__start = 0.0
+        self.__total = 0.0
+
+    def __enter__(self) -> "StageProfiler":
+        global _active_profiler
+        _active_profiler = self
+
+        if self.trace_python_memory:
+            tracemalloc.start()
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active_profiler
+        _active_profiler = None
+
+        self.__total = time.perf_counter() - self.__start
+        if self.trace_python_memory:
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        stats = self.stages.setdefault(
+            name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": None, "python_peak_mb": None}
+        )
+        open_stage = {"python_peak": 0}
+        self.__open_stages.append(open_stage)
+
+        if self.trace_python_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats["calls"] += 1
+            stats["wall_s"] += time.perf_counter() - wall
+            stats["cpu_s"] += time.process_time() - cpu
+            stats["peak_rss_mb"] = peak_rss_mb()
+
+            self.__open_stages.pop()
+            if self.trace_python_memory:
+                python_peak = max(tracemalloc.get_traced_memory()[1], open_stage["python_peak"])
+                stats["python_peak_mb"] = max(stats["python_peak_mb"] or 0, python_peak / (1024 * 1024))
+                # peaks of nested stages count for the enclosing stage as well
+                if self.__open_stages:
+                    parent = self.__open_stages[-1]
+                    parent["python_peak"] = max(parent["python_peak"], python_peak)
+
+    def report(self, **meta) -> dict:
+        """Return the measurements as a JSON serializable dict, along with the given `meta` data."""
+        return {
+            "meta": {"python": platform.python_version(), "platform": platform.platform(), **meta},
+            "total_wall_s": self.__total,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+        }
+
+    def dumps(self, **meta) -> str:
+        return json.dumps(self.report(**meta), indent=2)
+
+
+def stage(name: str):
+    """
+    Mark a stage of the pipeline for the active `StageProfiler`, if there is one (no-op otherwise).
+
+        with stage("spacy"):
+            doc = nlp(text)
+    """
+    if _active_profiler is None:
+        return _NO_STAGE
+    return _active_profiler.stage(name)
+
+
+def profiled(name: str):
+    """Decorator marking every call of the decorated function as the stage `name`."""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,131 @@
+import json
+import string
+from collections import Counter
+from collections.abc import Iterable
+
+from .models import Models
+from .profiling import profiled
+
+
+def is_word(word: str):
+    return any(c.isalpha() for c in word)
+
+
+class StyleProfile:
+    """
+    Partial aggregates from which every stylometric feature of a text can be computed. Profiles
+    are built in a single pass over the sentences of a text and can be merged, so shards of a
+    corpus can be profiled independently (and in parallel) and then combined.
+    """
+
+    def __init__(self) -> None:
+        self.word_counts: Counter[str] = Counter()
+        self.punctuation_counts: Counter[str] = Counter()
+        self.word_length_sum = 0
+        self.sentence_count = 0
+        # sentence length is measured in tokens (punctuation included)
+        self.sentence_token_count = 0
+
+    def add_sentence(self, sentence: str, tokens: list[str]):
+        """Add a sentence and its tokens to the profile."""
+        self.sentence_count += 1
+        self.sentence_token_count += len(tokens)
+
+        for token in tokens:
+            if is_word(token):
+                self.word_counts[token] += 1
+                self.word_length_sum += len(token)
+
+        # counted on the raw sentence, since the tokenizer rewrites some punctuation (e.g. quotes)
+        self.punctuation_counts.update(c for c in sentence if c in string.punctuation)
+
+    def merge(self, other: "StyleProfile") -> "StyleProfile":
+        """Add the aggregates of `other` to this profile and return it."""
+        self.word_counts.update(other.word_counts)
+        self.punctuation_counts.update(other.punctuation_counts)
+        self.word_length_sum += other.word_length_sum
+        self.sentence_count += other.sentence_count
+        self.sentence_token_count += other.sentence_token_count
+        return self
+
+    @property
+    def word_count(self) -> int:
+        return self.word_counts.total()
+
+    def features(self, top: int = 5) -> dict:
+        """
+        Return the stylometric features of the profiled text. Lists of words are limited to `top`
+        entries.
+        """
+        word_count = self.word_count
+
+        return {
+            "word_count": word_count,
+            "sentence_count": self.sentence_count,
+            # lexical features
+            # type-token ratio (TTR) = unique words / total words.
+            "ttr": len(self.word_counts) / word_count if word_count else 0.0,
+            "most_common": self.word_counts.most_common(top),
+            "avg_word_length": self.word_length_sum / word_count if word_count else 0.0,
+            # hapax legomena: words that occur only once in the text.
+            "hapax_legomena_count": sum(1 for count in self.word_counts.values() if count == 1),
+            "hapax_legomena": [word for word, count in self.word_counts.items() if count == 1][:top],
+            # hapax dislegomena: words that occur exactly twice.
+            "hapax_dislegomena_count": sum(1 for count in self.word_counts.values() if count == 2),
+            "hapax_dislegomena": [word for word, count in self.word_counts.items() if count == 2][:top],
+            # syntactic features
+            "avg_sentence_length": self.sentence_token_count / self.sentence_count if self.sentence_count else 0.0,
+            "punctuation_count": self.punctuation_counts.total(),
+            "punctuation": dict(self.punctuation_counts.most_common()),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "word_counts": dict(self.word_counts),
+            "punctuation_counts": dict(self.punctuation_counts),
+            "word_length_sum": self.word_length_sum,
+            "sentence_count": self.sentence_count,
+            "sentence_token_count": self.sentence_token_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StyleProfile":
+        profile = cls()
+        profile.word_counts = Counter(data["word_counts"])
+        profile.punctuation_counts = Counter(data["punctuation_counts"])
+        profile.word_length_sum = data["word_length_sum"]
+        profile.sentence_count = data["sentence_count"]
+        profile.sentence_token_count = data["sentence_token_count"]
+        return profile
+
+    def to_json(self, top: int = 5, **kwargs) -> str:
+        """Return the features along with the aggregates needed to merge this profile later."""
+        return json.dumps({"features": self.features(top), "aggregates": self.to_dict()}, ensure_ascii=False, **kwargs)
+
+    @classmethod
+    def from_json(cls, data: str) -> "StyleProfile":
+        return cls.from_dict(json.loads(data)["aggregates"])
+
+
+@profiled("stylometry")
+def profile_lines(lines: Iterable[str], models: Models) -> StyleProfile:
+    """
+    Build the `StyleProfile` of a stream of lines (paragraphs). Every sentence is tokenized
+    exactly once and only one paragraph is kept in memory at any time.
+    """
+    sent_tokenize = models.nltk.sent_tokenize
+    word_tokenize = models.nltk.word_tokenize
+
+    profile = StyleProfile()
+    for line in lines:
+        for sentence in sent_tokenize(line.strip()):
+            profile.add_sentence(sentence, word_tokenize(sentence))
+
+    return profile
+
+
+def merge_profiles(profiles: Iterable[StyleProfile]) -> StyleProfile:
+    merged = StyleProfile()
+    for profile in profiles:
+        merged.merge(profile)
+    return merged
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import string
+from collections import defaultdict
+from collections.abc import Iterable
+from functools import lru_cache
+
+# spaCy universal POS tags to RoWordNet POS codes (see `Synset.Pos.__str__`), any other tag matches
+# synsets of every POS, like `RoWordNet.synsets(..., pos=None)` does
+SPACY_TO_WORDNET_POS = {
+    "NOUN": "n",
+    "VERB": "v",
+    "ADV": "r",
+    "ADJ": "a",
+}
+ANY_POS = ""
+
+EMPTY_ENTRY: tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]] = ((), (), ())
+
+# a candidate sense of a word: (synset id, definition, normalized definition words)
+Sense = tuple[str, str, frozenset[str]]
+
+
+def normalize_words(words: Iterable[str]) -> frozenset[str]:
+    """
+    Return the set of lowercase `words`, stripped of surrounding punctuation.
+    """
+    normalized = (word.strip(string.punctuation + "„”«»–").lower() for word in words)
+    return frozenset(word for word in normalized if word)
+
+
+class WordNetIndex:
+    """
+    Read-only, disk persisted index mapping `(lemma, POS)` to the synonyms, hypernyms and negated
+    antonyms of that lemma in RoWordNet, i.e. everything the word replacement stage needs from it,
+    and words to their candidate senses (with pre-tokenized definitions) for Lesk.
+
+    The index is built once from RoWordNet (see `build`) and stored in an SQLite database that is
+    memory-mapped on load, so opening it is instant. Lookups go through an in-process LRU cache, so
+    the cost of a replacement pass depends on the number of unique lemmas, not of tokens.
+    """
+
+    VERSION = 2
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, path: str, cache_size: int = 65536):
+        self.path = path
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.connection.execute(f"PRAGMA mmap_size = {WordNetIndex.MMAP_SIZE}")
+        self.lookup = lru_cache(maxsize=cache_size)(self.__lookup)
+
+    def __lookup(self, lemma: str, pos: str) -> tuple[tuple[str, ...], tuple[str, ...], tuple[str, ...]]:
+        """
+        Return the `(synonyms, hypernyms, negated antonyms)` of `lemma` used as the spaCy POS `pos`.
+        Synonyms include the lemma itself, since the replacement stage filters by token text.
+        """
+        row = self.connection.execute(
+            "SELECT synonyms, hypernyms, antonyms FROM lookup WHERE lemma = ? AND pos = ?",
+            (lemma, SPACY_TO_WORDNET_POS.get(pos, ANY_POS)),
+        ).fetchone()
+        if row is None:
+            return EMPTY_ENTRY
+
+        return tuple(tuple(json.loads(column)) for column in row)
+
+    def senses(self, words: Iterable[str]) -> dict[str, tuple[Sense, ...]]:
+        """
+        Return the candidate senses of each of `words`, like `RoWordNet.synsets(word)` (non-strict,
+        so parts of multi-word literals match as well), fetched in as few queries as possible.
+        """
+        words = list(set(words))
+        senses = {word: () for word in words}
+
+        # stay well below the maximum number of SQL variables
+        for i in range(0, len(words), 500):
+            chunk = words[i : i + 500]
+            rows = self.connection.execute(
+                "SELECT s.literal, s.synset, d.definition, d.words "
+                "FROM senses s JOIN definitions d ON s.synset = d.synset "
+                f"WHERE s.literal IN ({', '.join('?' * len(chunk))}) ORDER BY s.literal, s.position",
+                chunk,
+            )
+            for literal, synset_id, definition, words_json in rows:
+                senses[literal] += ((synset_id, definition, frozenset(json.loads(words_json))),)
+
+        return senses
+
+    def close(self):
+        self.connection.close()
+
+    @classmethod
+    def build(cls, rown, path: str) -> "WordNetIndex":
+        """
+        Build the index for every literal of `rown` and write it to `path`.
+        """
+        # literals of each synset, of its hypernyms and of its antonyms
+        synset_entries = {}
+        for synset_id in rown.synsets():
+            synset = rown.synset(synset_id)
+            outbound_relations = rown.outbound_relations(synset_id)
+            synset_entries[synset_id] = (
+                str(synset.pos),
+                synset.literals,
+                [
+                    literal
+                    for ss, relation in outbound_relations
+                    if relation == "hypernym"
+                    for literal in rown.synset(ss).literals
+                ],
+                [
+                    "nu " + literal
+                    for ss, relation in outbound_relations
+                    if relation in {"antonym", "near_antonym"}
+                    for literal in rown.synset(ss).literals
+                ],
+            )
+
+        # same as the strict literal index of RoWordNet, keyed by POS as well
+        entries = defaultdict(lambda: ([], [], []))
+        for pos, literals, hypernyms, antonyms in synset_entries.values():
+            for literal in literals:
+                for key in ((literal, pos), (literal, ANY_POS)):
+                    synonyms_, hypernyms_, antonyms_ = entries[key]
+                    synonyms_.extend(literals)
+                    hypernyms_.extend(hypernyms)
+                    antonyms_.extend(antonyms)
+
+        # same as the non-strict literal index of RoWordNet
+        senses = defaultdict(list)
+        for synset_id in synset_entries:
+            for literal in rown.synset(synset_id).literals:
+                senses[literal].append(synset_id)
+                literal_parts = literal.split("_")
+                if len(literal_parts) > 1:
+                    for literal_part in literal_parts:
+                        senses[literal_part].append(synset_id)
+
+        # write to a temporary file first, so that a half written index is never picked up
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        with sqlite3.connect(tmp_path) as connection:
+            connection.execute(
+                "CREATE TABLE lookup ("
+                "lemma TEXT, pos TEXT, synonyms TEXT, hypernyms TEXT, antonyms TEXT, PRIMARY KEY (lemma, pos)"
+                ") WITHOUT ROWID"
+            )
+            connection.executemany(
+                "INSERT INTO lookup VALUES (?, ?, ?, ?, ?)",
+                (
+                    (lemma, pos, *(json.dumps(column, ensure_ascii=False) for column in columns))
+                    for (lemma, pos), columns in entries.items()
+                ),
+            )
+            connection.execute(
+                "CREATE TABLE senses (literal TEXT, position INTEGER, synset TEXT, PRIMARY KEY (literal, position))"
+                " WITHOUT ROWID"
+            )
+            connection.executemany(
+                "INSERT INTO senses VALUES (?, ?, ?)",
+                (
+                    (literal, position, synset_id)
+                    for literal, synset_ids in senses.items()
+                    for position, synset_id in enumerate(synset_ids)
+                ),
+            )
+            connection.execute("CREATE TABLE definitions (synset TEXT PRIMARY KEY, definition TEXT, words TEXT)")
+            connection.executemany(
+                "INSERT INTO definitions VALUES (?, ?, ?)",
+                (
+                    (synset_id, definition, json.dumps(sorted(normalize_words(definition.split())), ensure_ascii=False))
+                    for synset_id, definition in ((ss, rown.synset(ss).definition) for ss in synset_entries)
+                ),
+            )
+            connection.execute(f"PRAGMA user_version = {cls.VERSION}")
+        connection.close()
+        os.replace(tmp_path, path)
+
+        return cls(path)
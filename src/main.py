@@ -1,18 +1,67 @@
+import argparse
 import os
-import struct
-from tempfile import NamedTemporaryFile
-from tkinter import messagebox
+import random
+import subprocess
+import sys
+import threading
+from time import perf_counter
 
-import matplotlib.colors
+import numpy as np
 import pygame
-from matplotlib import pyplot as plt
-import tkinter as tk
 
+import stats
 from ai import QAI
-from constants import FPS, ScoreCategory
-from gui import AIPlayer, Button, Dice, Sheet
+from constants import FPS, IDLE_FPS, IDLE_TIMEOUT
+from gui import AIPlayer, Button, Dice, PerfHud, Sheet
 from gui.dialogue import Chat
-from state import GameState, PlayerState
+from gui.dialogue.text_layout import font_metrics
+from state import GameState
+from stats.render import image_path, is_rendered
+from utils import merge_rects, open_file, show_message_box
+
+parser = argparse.ArgumentParser(description="Yahtzee against a Q-learning AI.")
+parser.add_argument(
+    "--headless",
+    action="store_true",
+    help="run without a window (SDL dummy driver) on a virtual clock, as fast as possible",
+)
+parser.add_argument(
+    "--ai-vs-ai", action="store_true", help="let the bomberman AI play instead of you (implied by --headless)"
+)
+parser.add_argument(
+    "--games", type=int, help="quit after this many games (default: 1 with --headless, no limit otherwise)"
+)
+parser.add_argument(
+    "--step", type=float, default=0.5, help="virtual seconds per frame with --headless (collapses animations and waits)"
+)
+parser.add_argument(
+    "--statistics-file",
+    help="file the statistics of your games are saved to (default: yahtzee-stats.bin, required with --headless)",
+)
+parser.add_argument("--seed", type=int, help="seed for the dice, for reproducible runs")
+parser.add_argument("--perf-hud", action="store_true", help="show the performance overlay (toggled with F3)")
+parser.add_argument(
+    "--perf-trace",
+    help="file the trace of the last frames is dumped to with F4 (default: perf-trace.json) and when the game exits",
+)
+args = parser.parse_args()
+
+if args.headless:
+    # SDL picks its drivers when pygame is initialized
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    args.ai_vs_ai = True
+    if args.games is None:
+        args.games = 1
+    if args.statistics_file is None:
+        # headless runs are AI against AI, which must not end up in the player's statistics by accident
+        parser.error("--headless requires --statistics-file")
+elif args.statistics_file is None:
+    args.statistics_file = "yahtzee-stats.bin"
+
+if args.seed is not None:
+    random.seed(args.seed)
+    np.random.seed(args.seed)
 
 pygame.init()
 pygame.display.set_caption("Yahtzee")
@@ -47,98 +96,106 @@ replay_button = Button(replay_button_bounds, "Replay", font)
 statistics_button_bounds = pygame.Rect(0, 0, 100, 50)
 statistics_button_bounds.center = (game_bounds.bottomright[0] - 60, game_bounds.bottomright[1] - 30)
 statistics_button = Button(statistics_button_bounds, "Statistics", font)
-statistics_file = "yahtzee-stats.bin"
+statistics_file = args.statistics_file
+# games are saved from a background thread, the game loop never waits for the disk
+statistics_writer = stats.StatisticsWriter(statistics_file)
+# the process rendering the statistics, if one is running
+statistics_process: subprocess.Popen | None = None
+STATISTICS_RENDERED = pygame.event.custom_type()
 
 sheet = Sheet(sheet_bounds, font)
 final_scores: tuple[int, int] | None = None
 
 ai: AIPlayer = AIPlayer(QAI("7"), sheet, dice)
 ai2: AIPlayer = AIPlayer(QAI("bomberman"), sheet, dice)
+# who played the games, as saved in the statistics
+player_name = "q:bomberman" if args.ai_vs_ai else "human"
+opponent_name = "q:7"
 
 textbox = Chat(pygame.Rect(1280, 0, 320, 720), 200, dialogues_font)
 generated_feedback = False
+games_played = 0
+game_start = perf_counter()
+frames = 0
+start_time = perf_counter()
+
+# areas of the screen to redraw on the next frame, only the ones that changed are redrawn
+dirty_rects: list[pygame.Rect] = [screen.get_rect()]
+drawn_final_scores: tuple[int, int] | None = None
+
+
+def cache_counts() -> dict[str, int]:
+    """Returns the number of surfaces (and glyph metrics) kept in the caches of the game."""
+    return {
+        "rotated die sprites": dice.sprites.rotated.cache_info().currsize,
+        "sheet glyphs": sheet.glyph.cache_info().currsize,
+        "chat message surfaces": len(textbox.rendered_messages),
+        "chat glyph metrics": len(font_metrics(dialogues_font).glyphs),
+    }
 
 
 def show_statistics():
     if not os.path.isfile(statistics_file):
-        root = tk.Tk()
-        root.withdraw()
-        messagebox.showinfo("Info", "No statistics available!")
+        show_message_box("info", "Info", "No statistics available!")
         return None
     if not os.access(statistics_file, os.R_OK):
-        root = tk.Tk()
-        root.withdraw()
-        messagebox.showerror("Error", "Cannot read statistics file!")
+        show_message_box("error", "Error", "Cannot read statistics file!")
+        return None
+
+    try:
+        records = stats.load_records(statistics_file)
+    except ValueError as e:
+        # e.g. a file saved by a newer version of the game
+        show_message_box("error", "Error", str(e))
+        return None
+    if len(records) == 0:
+        show_message_box("info", "Info", "No statistics available!")
         return None
-    struct_size = struct.calcsize("14i")
-    with open(statistics_file, "rb") as file:
-        fdata = file.read()
-        player_states = [
-            PlayerState.from_array(list(struct.unpack("14i", fdata[i : i + struct_size])))
-            for i in range(0, len(fdata), struct_size)
-        ]
-
-    total_scores = [player_state.total_score() for player_state in player_states]
-    category_scores = list(zip(*[player_state.scores for player_state in player_states]))
-    rerolls = [player_state.rerolls for player_state in player_states]
-    games = range(1, len(player_states) + 1)
-
-    # Create the figure and subplots
-    fig, ax = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
-
-    # Plot total score evolution
-    ax[0].plot(games, total_scores, marker="o", label="Total Score", color="blue")
-    ax[0].set_title("Total Score Evolution")
-    ax[0].set_ylabel("Total Score")
-    ax[0].legend()
-    ax[0].grid(True)
-
-    # Plot category score evolution
-    cmap = matplotlib.colormaps["tab20"]
-    colors = [cmap(i / len(category_scores)) for i in range(len(category_scores))]
-    for category_data, category_type, color in zip(category_scores, list(ScoreCategory)[1:], colors):
-        ax[1].plot(
-            games, category_data, marker="o", label=category_type.name.capitalize().replace("_", " "), color=color
+
+    if is_rendered(statistics_file):
+        open_statistics()
+    elif statistics_process is None:
+        render_statistics()
+
+
+def render_statistics():
+    """
+    Renders the statistics in a separate process (matplotlib is slow to import and to plot), and
+    posts a STATISTICS_RENDERED event once the image is ready.
+    """
+    global statistics_process
+
+    env = os.environ.copy()
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (source_dir, env.get("PYTHONPATH"))))
+    statistics_process = subprocess.Popen(
+        [sys.executable, "-m", "stats.render", statistics_file],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    threading.Thread(target=wait_for_statistics, args=(statistics_process,), daemon=True).start()
+
+
+def wait_for_statistics(process: subprocess.Popen):
+    _, error = process.communicate()
+    # the game may have been closed in the meantime
+    if pygame.get_init():
+        pygame.event.post(
+            pygame.event.Event(
+                STATISTICS_RENDERED, returncode=process.returncode, error=error.decode(errors="replace").strip()
+            )
         )
-    ax[1].set_title("Category Score Evolution")
-    ax[1].set_ylabel("Score per Category")
-    ax[1].legend(loc="upper left", bbox_to_anchor=(1, 1))
-    ax[1].grid(True)
-
-    # Plot reroll evolution
-    ax[2].plot(games, rerolls, marker="o", label="Rerolls Used", color="red")
-    ax[2].set_title("Reroll Evolution")
-    ax[2].set_xlabel("Game Number")
-    ax[2].set_ylabel("Rerolls Used")
-    ax[2].set_xticks(games)
-    # ax[2].xaxis.get_major_locator().set_params(integer=True)
-    ax[2].yaxis.get_major_locator().set_params(integer=True)
-    ax[2].legend()
-    ax[2].grid(True)
-
-    # Adjust layout to fit the category legend
-    plt.tight_layout(rect=(0, 0, 0.85, 1))
 
+
+def open_statistics():
     try:
-        with open("statistics.png", "wt+") as file:
-            plt.savefig(file.name)
-            plt.close()
-            os.startfile(file.name)
+        open_file(image_path(statistics_file))
     except (Exception,) as e:
-        try:
-            with NamedTemporaryFile(delete=True, suffix=".png") as temp_file:
-                plt.savefig(temp_file.name)
-                plt.close()
-                os.startfile(temp_file.name)
-        except (Exception,):
-            root = tk.Tk()
-            root.withdraw()
-            messagebox.showerror("Error", str(e))
+        show_message_box("error", "Error", str(e))
 
 
-def render():
-    dice.update(dt)
-    textbox.update(dt)
+def draw_scene():
     screen.fill("purple")
 
     pygame.draw.rect(screen, "blue", game_bounds)
@@ -165,14 +222,100 @@ def render():
         replay_button.draw(screen)
 
     textbox.draw(screen)
-    pygame.display.flip()
+    perf_hud.draw(screen)
+
+
+def render():
+    global drawn_final_scores
+
+    dice.update(dt)
+    textbox.update(dt)
+
+    # the final scores box covers the game area
+    if final_scores != drawn_final_scores:
+        dirty_rects.append(game_bounds)
+        drawn_final_scores = final_scores
+
+    for widget in (roll_dice_button, statistics_button, replay_button, sheet, dice, textbox, perf_hud):
+        dirty_rects.extend(widget.dirty_rects())
 
+    if not dirty_rects:
+        return
+
+    with perf_hud.measure("draw"):
+        # the whole scene is drawn clipped to each changed area, so that overlapping widgets are
+        # redrawn in the right order
+        rects = merge_rects(dirty_rects)
+        for rect in rects:
+            screen.set_clip(rect)
+            draw_scene()
+        screen.set_clip(None)
+
+        pygame.display.update(rects)
+    dirty_rects.clear()
+
+
+def new_game():
+    global state, final_scores, generated_feedback, game_start
+
+    state = GameState()
+    game_start = perf_counter()
+    dice.reset()
+    dice.current_pos = 0
+    sheet.update_score(state)
+    final_scores = None
+    generated_feedback = False
+
+    ai.reset()
+    ai2.reset()
+
+
+def frame_rate() -> int | None:
+    """
+    Returns the frame rate the game must run at right now, or None if nothing can change on its
+    own until the next event.
+    """
+    ai_playing = not state.is_final() and (state.current_player == 1 or args.ai_vs_ai)
+    if dice.in_animation() or textbox.in_animation() or ai_playing:
+        return FPS
+    if textbox.building_response:
+        return IDLE_FPS
+    return None
+
+
+perf_hud = PerfHud(game_bounds.topleft, dialogues_font, cache_counts)
+if args.perf_hud:
+    perf_hud.toggle()
+
+# the event that woke the game up while idle, handled before the events queued after it
+woken_event = None
 
 while running:
-    for event in pygame.event.get():
+    perf_hud.begin_frame()
+
+    events = pygame.event.get()
+    if woken_event is not None:
+        events.insert(0, woken_event)
+        woken_event = None
+
+    for event in events:
         textbox.handle_event(event, state)
         if event.type == pygame.QUIT:
             running = False
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            perf_hud.toggle()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+            perf_hud.dump(args.perf_trace or "perf-trace.json")
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            dirty_rects.append(screen.get_rect())
+        elif event.type == STATISTICS_RENDERED:
+            statistics_process = None
+            if event.returncode:
+                # a killed render process exits without reporting anything
+                message = event.error.splitlines()[-1] if event.error else "Could not render the statistics!"
+                show_message_box("error", "Error", message)
+            else:
+                open_statistics()
         elif event.type == pygame.MOUSEBUTTONDOWN:
             mouse_pos = event.pos
 
@@ -181,19 +324,11 @@ while running:
 
             if state.is_final():
                 if replay_button.clicked(mouse_pos):
-                    state = GameState()
-                    dice.reset()
-                    dice.current_pos = 0
-                    sheet.update_score(state)
-                    final_scores = None
-                    generated_feedback = False
-
-                    ai.reset()
-                    # ai2.reset()
+                    new_game()
 
                 continue
 
-            if state.current_player != 0:
+            if state.current_player != 0 or args.ai_vs_ai:
                 continue
 
             if roll_dice_button.clicked(mouse_pos) and not dice.in_animation():
@@ -217,24 +352,71 @@ while running:
                 except ValueError as _:
                     pass
 
-    if not state.is_final() and state.current_player == 1 and not dice.in_animation():
-        state = ai.play(dt, state)
+    with perf_hud.measure("ai"):
+        if not state.is_final() and state.current_player == 1 and not dice.in_animation():
+            state = ai.play(dt, state)
 
-    # if not state.is_final() and state.current_player == 1 and not dice.in_animation():
-    #     state = ai2.play(dt, state)
+        if not state.is_final() and state.current_player == 0 and args.ai_vs_ai and not dice.in_animation():
+            state = ai2.play(dt, state)
 
-    if state.is_final():
-        if not generated_feedback:
+    if state.is_final() and final_scores is None:
+        # there is no one to read the feedback in headless mode (and no need to call the API)
+        if not generated_feedback and not args.headless:
             textbox.generate_feedback(state)
             generated_feedback = True
-        state.save_statistics(statistics_file)
+        state.save_statistics(
+            statistics_writer,
+            duration=perf_counter() - game_start,
+            seed=args.seed,
+            player=player_name,
+            opponent=opponent_name,
+        )
         final_scores = (
             state.player_states[0].total_score(),
             state.player_states[1].total_score(),
         )
 
-    render()
+        games_played += 1
+        if args.headless:
+            print(f"game {games_played}: {final_scores[0]} - {final_scores[1]}", flush=True)
 
-    dt = clock.tick(FPS) / 1000
+    render()
+    frames += 1
+
+    if args.games is not None and games_played >= args.games:
+        running = False
+    elif args.headless and state.is_final():
+        new_game()
+
+    if args.headless:
+        perf_hud.end_frame()
+        # virtual clock, the game runs as fast as it can
+        clock.tick()
+        dt = args.step
+        continue
+
+    rate = frame_rate()
+    perf_hud.end_frame(idle=rate is None)
+    if rate is None:
+        # sleep until something happens, the event is handled on the next frame
+        event = pygame.event.wait(IDLE_TIMEOUT)
+        if event.type != pygame.NOEVENT:
+            woken_event = event
+
+    # the frame after a wake up starts right away, the game already slept
+    dt = (clock.tick() if woken_event is not None else clock.tick(rate or IDLE_FPS)) / 1000
+    if rate != FPS:
+        # nothing was animated while idle, so an animation starting now starts with a single frame step
+        dt = min(dt, 1 / FPS)
+
+statistics_writer.close()
+
+perf_hud.begin_frame()
+if args.perf_trace:
+    perf_hud.dump(args.perf_trace, games=games_played, headless=args.headless)
 
 pygame.quit()
+
+if args.headless:
+    elapsed = perf_counter() - start_time
+    print(f"{games_played} games, {frames} frames in {elapsed:.2f} seconds ({frames / elapsed:.0f} frames per second)")
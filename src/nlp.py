@@ -1,193 +1,201 @@
-import sys
-import string
-import re
-
-import nltk
-import pycountry
-
-import rowordnet
-from rowordnet import Synset
+import argparse
+import contextlib
+import itertools
+import json
+import os
 import random
-from langdetect import detect
-from nltk.probability import FreqDist
-from nltk.tokenize import sent_tokenize, word_tokenize
-
-import spacy
-from spacy.cli import download
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
-
-# initialize models
-download("ro_core_news_sm")
-nlp = spacy.load("ro_core_news_sm")
-rown = rowordnet.RoWordNet()
-nltk.download("punkt_tab")
-
-tokenizer = AutoTokenizer.from_pretrained("dumitrescustefan/gpt-neo-romanian-780m")
-model = AutoModelForCausalLM.from_pretrained("dumitrescustefan/gpt-neo-romanian-780m")
-model.generation_config.pad_token_id = model.generation_config.eos_token_id
-
-seed = random.randint(0, 2**32 - 1)
-torch.manual_seed(seed)
-torch.cuda.manual_seed_all(seed)
-
-
-def is_word(word: str):
-    return any(c.isalpha() for c in word)
-
-
-# extract text
-if len(sys.argv) < 2:
-    text = open("assets/nlp/Klaus Iohannis_texts.txt", encoding="utf8").read()
-else:
-    text = sys.argv[1]
-text = text.strip()
-
-nlp.max_length = len(text)
-
-print("\n\n\nStylometric characteristics:\n")
-
-# detect lang
-lang = detect(text)
-lang_name = pycountry.languages.get(alpha_2=lang)
-
-print(lang, lang_name)
-
-# extract stylometric information
-words = word_tokenize(text)
-words_without_punctuation = [word for word in words if is_word(word)]
-sentences = sent_tokenize(text)
-
-# lexical features
-# type-token ratio (TTR) = unique words / total words.
-ttr = len(set(words_without_punctuation)) / len(words_without_punctuation)
-print(f"{ttr=}")
-
-# most common words
-freq_dist = FreqDist(words_without_punctuation)
-print(f"top 5 most common words: {freq_dist.most_common(5)}")
-
-# avg word length
-avg_word_length = sum(len(word) for word in words_without_punctuation) / len(words_without_punctuation)
-print(f"{avg_word_length=}")
-
-# hapax legomena: count of words that occur only once in the text.
-hapax_legomena = [word for word, count in freq_dist.items() if count == 1]
-print(f"hapax_legomena={hapax_legomena[:5]}")
-
-# hapax dislegomena: count of words that occur exactly twice.
-hapax_dislegomena = [word for word, count in freq_dist.items() if count == 2]
-print(f"hapax_dislegomena={hapax_dislegomena[:5]}")
-
-# syntactic features
-# avg sentence length
-avg_sentence_length = sum(len(word_tokenize(sent)) for sent in sentences) / len(sentences)
-print(f"{avg_sentence_length=}")
-
-# count of punctuations
-punctuation_count = sum(1 for char in text if char in string.punctuation)
-print(f"{punctuation_count=}")
-
-
-def str_to_synset_pos(pos_str: str):
-    synset_pos_map = {
-        "NOUN": Synset.Pos.NOUN,
-        "VERB": Synset.Pos.VERB,
-        "ADV": Synset.Pos.ADVERB,
-        "ADJ": Synset.Pos.ADJECTIVE,
-    }
-    if pos_str in synset_pos_map:
-        return synset_pos_map[pos_str]
-    return None
-
-
-# Lesk algorithm, used to find the word meaning in WordNet
-# most similar to the sentence/paragraph given;
-# used for determining the "sense" of keywords in sentences
-def lesk(sentence: list[str], word: str, pos=None, wn=rown):
-    context = set(x for x in sentence if x != "")
-    synsets = wn.synsets(word, pos=pos if pos else None)
-    if not synsets:
-        return None
-    _, sense = max((len(context.intersection(wn.synset(ss).definition.split())), ss) for ss in synsets)
-    return sense
-
-
-doc = nlp(text)
-replaced_words: list[str] = []
-
-
-def append_word_with_space(arr, word, pos=None):
-    if pos != "PUNCT" and len(arr) > 0 and word[0] != "-" and arr[-1][-1] != "-":
-        replaced_words.append(" ")
-    replaced_words.append(word)
+import sys
 
+from language import (
+    Models,
+    StyleProfile,
+    detect_language,
+    merge_profiles,
+    profile_lines,
+    replace_words,
+)
+from language.models import DEFAULT_CACHE_DIR
+from language.profiling import StageProfiler, stage
+from language.pipeline import KeywordCollector, keywords_with_meanings, parse_stream, replace_words_stream, split_text
+
+STAGES = ["stylometry", "replace", "keywords", "generate"]
+
+parser = argparse.ArgumentParser(description="Romanian NLP pipeline: stylometry, word replacement, keywords.")
+parser.add_argument("text", nargs="?", help="text to analyse (defaults to the text in --file)")
+parser.add_argument("--file", default="assets/nlp/Klaus Iohannis_texts.txt", help="file to read the text from")
+parser.add_argument(
+    "--stages",
+    default=",".join(STAGES),
+    help=f"comma separated list of stages to run, from: {', '.join(STAGES)} (generate implies keywords)",
+)
+parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="directory where downloaded models are kept")
+parser.add_argument("--offline", action="store_true", help="never download models, fail if they are not cached")
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="replace words chunk by chunk, printing each chunk as soon as it is ready (bounded memory)",
+)
+parser.add_argument("--split", choices=["paragraph", "sentence"], default="paragraph", help="chunk size for --stream")
+parser.add_argument("--batch-size", type=int, default=64, help="number of chunks spaCy parses at once with --stream")
+parser.add_argument("--n-process", type=int, default=1, help="number of spaCy worker processes with --stream")
+parser.add_argument("--quantize", action="store_true", help="use an int8 dynamically quantized generation model (CPU)")
+parser.add_argument("--torch-threads", type=int, help="number of intra-op threads used by torch")
+parser.add_argument("--torch-interop-threads", type=int, help="number of inter-op threads used by torch")
+parser.add_argument("--gen-batch-size", type=int, default=8, help="number of keyword prompts generated at once")
+parser.add_argument("--max-new-tokens", type=int, default=96, help="maximum length of a generated sentence in tokens")
+parser.add_argument(
+    "--gen-workers",
+    type=int,
+    default=1,
+    help="number of threads generating sentence batches (torch threads are split between them)",
+)
+parser.add_argument("--max-keywords", type=int, default=10, help="number of keywords extracted from the text")
+parser.add_argument("--json", action="store_true", help="print the stylometric profile as JSON (mergeable)")
+parser.add_argument(
+    "--merge",
+    nargs="+",
+    metavar="PROFILE",
+    help="print the combination of JSON stylometric profiles (from --json) instead of analysing a text",
+)
+parser.add_argument("--seed", type=int, help="seed for word replacement and sentence generation")
+parser.add_argument("--lines", help="only use the given slice of lines of the input, e.g. 0:10")
+parser.add_argument("--profile", action="store_true", help="print a per-stage timing and memory report to stderr")
+parser.add_argument(
+    "--trace-memory", action="store_true", help="also trace the peak Python memory of each stage (slower)"
+)
+parser.add_argument(
+    "--benchmark",
+    action="store_true",
+    help="reproducible benchmark: fixed seed (0 unless --seed is given) and input slice (--lines, default 0:20), "
+    "the usual output is discarded and only the profiling report is printed",
+)
+
+
+def read_lines(args: argparse.Namespace):
+    start, stop = None, None
+    if args.lines:
+        start, stop = (int(bound) if bound else None for bound in args.lines.split(":"))
+
+    if args.text is not None:
+        yield from itertools.islice(args.text.splitlines(keepends=True), start, stop)
+        return
+
+    with open(args.file, encoding="utf8") as file:
+        yield from itertools.islice(file, start, stop)
+
+
+def print_profile(profile: StyleProfile, lang: tuple[str, str | None] | None = None, as_json: bool = False):
+    if as_json:
+        print(json.dumps({"language": lang[0] if lang else None, **json.loads(profile.to_json())}, ensure_ascii=False))
+        return
+
+    features = profile.features()
+    print("\n\n\nStylometric characteristics:\n")
+    if lang is not None:
+        print(*lang)
+    for name in ["ttr", "avg_word_length", "avg_sentence_length", "punctuation_count"]:
+        print(f"{name}={features[name]}")
+    print(f"top 5 most common words: {features['most_common']}")
+    print(f"hapax_legomena={features['hapax_legomena']}")
+    print(f"hapax_dislegomena={features['hapax_dislegomena']}")
+
+
+def run(args: argparse.Namespace, stages: set[str], models: Models):
+    # entities are collected from the parse made for word replacement, if there is one
+    keywords = KeywordCollector() if "keywords" in stages or "generate" in stages else None
+
+    if "stylometry" in stages:
+        # the first lines of the text are enough to detect its language
+        sample = "".join(line for line, _ in zip(read_lines(args), range(20)))
+        print_profile(profile_lines(read_lines(args), models), detect_language(sample), as_json=args.json)
+
+    if "replace" in stages:
+        print("\n\n\nText with words replaced:\n")
+
+        if args.stream:
+            chunks = split_text(read_lines(args), models, args.split)
+            for replaced_chunk in replace_words_stream(
+                chunks, models, batch_size=args.batch_size, n_process=args.n_process, keywords=keywords
+            ):
+                print(replaced_chunk, flush=True)
+        else:
+            text = "".join(read_lines(args)).strip()
+            nlp = models.spacy
+            with stage("spacy"):
+                nlp.max_length = max(nlp.max_length, len(text))
+                doc = nlp(text)
+            print(replace_words(doc, models))
+            if keywords is not None:
+                keywords.add(doc)
+    elif keywords is not None:
+        chunks = split_text(read_lines(args), models, args.split)
+        for doc in parse_stream(chunks, models, batch_size=args.batch_size, n_process=args.n_process):
+            keywords.add(doc)
+
+    if keywords is not None:
+        meanings = keywords_with_meanings(keywords, models, args.max_keywords)
+        print(f"\n\n\nKeywords in text: {', '.join(meanings.keys())}")
+
+        if "generate" in stages:
+            from language.generation import configure_torch, iter_sentences, seed_generation
+
+            configure_torch(args.torch_threads, args.torch_interop_threads, workers=args.gen_workers)
+            seed_generation(args.seed)
+
+            # sentences are printed as soon as their batch is generated
+            sentences = iter_sentences(
+                meanings,
+                models,
+                batch_size=args.gen_batch_size,
+                max_new_tokens=args.max_new_tokens,
+                workers=args.gen_workers,
+            )
+            with stage("generate"):
+                for keyword, sentence in sentences:
+                    print(f'\n\nSentence with keyword "{keyword}":')
+                    print(sentence, flush=True)
+
+
+def main():
+    args = parser.parse_args()
+
+    if args.benchmark:
+        args.seed = 0 if args.seed is None else args.seed
+        args.lines = args.lines or "0:20"
+
+    stages = set(args.stages.split(","))
+    if unknown_stages := stages - set(STAGES):
+        parser.error(f"unknown stages: {', '.join(sorted(unknown_stages))}")
+
+    if args.merge:
+        profiles = []
+        for path in args.merge:
+            with open(path, encoding="utf8") as file:
+                profiles.append(StyleProfile.from_json(file.read()))
+        print_profile(merge_profiles(profiles), as_json=args.json)
+        return
+
+    models = Models(args.cache_dir, offline=args.offline, quantize=args.quantize)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    if not (args.profile or args.benchmark):
+        run(args, stages, models)
+        return
+
+    with StageProfiler(trace_python_memory=args.trace_memory) as profiler:
+        if args.benchmark:
+            with open(os.devnull, "w", encoding="utf8") as devnull, contextlib.redirect_stdout(devnull):
+                run(args, stages, models)
+        else:
+            run(args, stages, models)
+
+    print(
+        profiler.dumps(stages=sorted(stages), lines=args.lines, seed=args.seed, stream=args.stream),
+        file=sys.stdout if args.benchmark else sys.stderr,
+    )
 
-for token in doc:
-    synsets = rown.synsets(token.lemma_, pos=str_to_synset_pos(token.pos_), strict=True)
-    if not synsets:
-        append_word_with_space(replaced_words, token.text, token.pos_)
-        continue
 
-    synonyms = [
-        literal for ss in synsets for literal in rown.synset(ss).literals if literal.strip() != token.text.strip()
-    ]
-
-    outbound_relations = [x for ss in synsets for x in rown.outbound_relations(ss)]
-    hypernym_synsets = [ss for ss, relation in outbound_relations if relation == "hypernym"]
-    antonym_synsets = [ss for ss, relation in outbound_relations if relation in {"antonym", "near_antonym"}]
-    hypernyms = [literal for ss in hypernym_synsets for literal in rown.synset(ss).literals]
-    not_antonyms = ["nu " + literal for ss in antonym_synsets for literal in rown.synset(ss).literals]
-
-    possible_words = [*synonyms, *hypernyms, *not_antonyms]
-    if not possible_words or random.randint(0, 4) != 0:
-        append_word_with_space(replaced_words, token.text, token.pos_)
-        continue
-
-    final_word = (
-        possible_words[random.randint(0, len(possible_words) - 1) if len(possible_words) > 1 else 0]
-        .replace("_", " ")
-        .replace("[", "")
-        .replace("]", "")
-        .replace("|", "")
-    )
-    append_word_with_space(replaced_words, final_word, token.pos_)
-
-
-replaced_words_result = "".join(replaced_words)
-print("\n\n\nText with words replaced:\n")
-print(replaced_words_result)
-
-# get the first paragraph
-paragraph = text.split("\n")[0]
-paragraph_doc = nlp(paragraph)
-named_entities = paragraph_doc.ents
-paragraph_words = [x.text for x in paragraph_doc]
-
-keywords_with_meanings = {}
-
-for entity in named_entities:
-    synset = lesk(paragraph_words, entity.lemma_)
-    keywords_with_meanings[entity.text] = rown.synset(synset).definition if synset else None
-
-print(f"\n\n\nKeywords in first paragraph: {', '.join(keywords_with_meanings.keys())}")
-
-# generate sentences
-for keyword, meaning in keywords_with_meanings.items():
-    prompt = f'O propoziție conținând cuvântul "{keyword}"'
-    if meaning is not None:
-        prompt += f', cuvânt care are definiția "{meaning}"'
-    prompt += ", este:"
-    inputs = tokenizer.encode(prompt, return_tensors="pt")
-    text = model.generate(inputs, max_new_tokens=256, no_repeat_ngram_size=2)
-
-    print(f'\n\nSentence with keyword "{keyword}":')
-    generated_text = tokenizer.decode(text[0])[len(prompt) :].strip()
-    sentence_match = re.match(r'(\"([^"]+)\")|([^.?!]*[.?!])', generated_text)
-    if sentence_match:
-        sentence = sentence_match.group(0).strip('"')
-        if sentence[-1] not in {".", "?", "!"}:
-            sentence += "."
-        print(sentence)
-    else:
-        print(generated_text)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import sys
+from time import time
+
+from language.batch import GENERATE_WORKERS, STAGES, analyse_documents, iter_documents
+from language.models import DEFAULT_CACHE_DIR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the romanian NLP pipeline over many documents.")
+    parser.add_argument("input", help="directory of .txt files or JSONL file of {'id': ..., 'text': ...} documents")
+    parser.add_argument("--output", help="JSONL file to write the results to (defaults to stdout)")
+    parser.add_argument(
+        "--stages",
+        default="stylometry,replace,keywords",
+        help=f"comma separated list of stages, from: {', '.join(STAGES)}",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help=f"number of worker processes (default: one per CPU, {GENERATE_WORKERS} with the generate stage)",
+    )
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="directory where downloaded models are kept")
+    parser.add_argument("--results-dir", help="directory of cached results (defaults to <cache-dir>/results)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write cached results")
+    parser.add_argument("--offline", action="store_true", help="never download models, fail if they are not cached")
+    parser.add_argument(
+        "--quantize", action="store_true", help="use an int8 dynamically quantized generation model (CPU)"
+    )
+    parser.add_argument("--max-keywords", type=int, default=10, help="number of keywords extracted from each document")
+    args = parser.parse_args()
+
+    stages = args.stages.split(",")
+    if unknown_stages := set(stages) - set(STAGES):
+        parser.error(f"unknown stages: {', '.join(sorted(unknown_stages))}")
+
+    results_dir = None if args.no_cache else (args.results_dir or os.path.join(args.cache_dir, "results"))
+
+    output = open(args.output, "w", encoding="utf8") if args.output else sys.stdout
+    start = time()
+    processed, cached = 0, 0
+
+    try:
+        for document_id, result, is_cached in analyse_documents(
+            iter_documents(args.input),
+            stages=stages,
+            options={"max_keywords": args.max_keywords},
+            models_dir=args.cache_dir,
+            results_dir=results_dir,
+            offline=args.offline,
+            quantize=args.quantize,
+            workers=args.workers,
+        ):
+            output.write(json.dumps({"id": document_id, **result}, ensure_ascii=False) + "\n")
+            output.flush()
+            processed += 1
+            cached += is_cached
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"{processed} documents ({cached} cached) in {time() - start:.2f} seconds", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
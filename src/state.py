@@ -1,10 +1,7 @@
-import os
-import struct
-import tkinter as tk
-from tkinter import messagebox
-from typing import overload
+import time
 
 from constants import CATEGORY_COUNT, ScoreCategory
+from stats import StatisticsWriter, make_record
 from utils import reroll, score_roll
 
 
@@ -141,20 +138,30 @@ class GameState:
         )
         return self.__is_final
 
-    def save_statistics(self, filepath: str, player_index: int = 0):
-        try:
-            if self.saved:
-                return
-            if not self.is_final():
-                raise ValueError(f"State must be final to save statistics")
-            self.saved = True
-            player_stats = self.player_states[player_index]
-            with open(filepath, "ab+") as file:
-                file.write(struct.pack("14i", *player_stats.scores, player_stats.rerolls - CATEGORY_COUNT))
-        except (Exception,) as e:
-            root = tk.Tk()
-            root.withdraw()
-            messagebox.showerror("Error", str(e))
+    def save_statistics(self, writer: StatisticsWriter, player_index: int = 0, **metadata):
+        """
+        Save the statistics of player `player_index` for this (final) game with `writer`, along with
+        the `metadata` of the game (see `make_record`). The game is only saved once.
+        """
+        if self.saved:
+            return
+        if not self.is_final():
+            raise ValueError(f"State must be final to save statistics")
+        self.saved = True
+
+        player_stats = self.player_states[player_index]
+        opponent_score = max(
+            (state.total_score() for i, state in enumerate(self.player_states) if i != player_index), default=-1
+        )
+        writer.write(
+            make_record(
+                player_stats.scores,
+                player_stats.rerolls - CATEGORY_COUNT,
+                opponent_score,
+                timestamp=time.time(),
+                **metadata,
+            )
+        )
 
     def __repr__(self):
         return f"GameState({self.dice}, {self.current_player}, {self.rerolls}, {self.player_states})"
@@ -0,0 +1,15 @@
+from .downsample import lttb, min_max
+from .query import filter_records, summarize
+from .rollup import BUCKET_SIZE, bucket_means, load_rollup, read_rollup, running_sums, sync_rollup
+from .store import (
+    RECORD_DTYPE,
+    category_scores,
+    compact,
+    load_records,
+    make_record,
+    read_version,
+    rerolls,
+    total_scores,
+    upper_bonuses,
+)
+from .writer import StatisticsWriter
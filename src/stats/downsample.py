@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample the series `(x, y)` to `points` points with Largest-Triangle-Three-Buckets, which
+    keeps the points that shape the line the most (peaks and dips included). Series with at most
+    `points` points are returned as they are.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return x, y
+
+    # the first and last points are kept, the others are split into `points - 2` buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # the third vertex of the triangles is the average point of the next bucket
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+
+    return x[selected], y[selected]
+
+
+def min_max(x: np.ndarray, y: np.ndarray, points: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample the series `(x, y)` to at most `points` points by keeping the minimum and the
+    maximum of each of `points // 2` buckets (in their original order), so that the range covered
+    by the series is preserved exactly. Series with at most `points` points are returned as they are.
+    """
+    n = len(x)
+    if points >= n or points < 2:
+        return x, y
+
+    size = -(-n // (points // 2))
+    # the last bucket is padded with its last point, which does not change its minimum or maximum
+    padded = np.concatenate([y, np.repeat(y[-1:], -n % size)]).reshape(-1, size)
+    offsets = np.arange(len(padded))[:, None] * size
+    selected = np.sort(np.stack([padded.argmin(axis=1), padded.argmax(axis=1)], axis=1), axis=1) + offsets
+    selected = np.unique(np.minimum(selected.ravel(), n - 1))
+
+    return x[selected], y[selected]
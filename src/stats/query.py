@@ -0,0 +1,139 @@
+import numpy as np
+
+from constants import ScoreCategory
+
+from .store import rerolls, upper_bonuses
+
+YAHTZEE_SCORE = 50
+
+
+def filter_records(
+    records: np.ndarray,
+    games: slice = slice(None),
+    since: float | None = None,
+    until: float | None = None,
+    player: str | None = None,
+    opponent: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the numbers (1-based, in `records`) of the games of `records` selected by all the given
+    filters, and their records. `games` selects by position, `since` and `until` (unix time,
+    `until` excluded) by when the game ended and `player` / `opponent` by who played it. Games
+    without a timestamp (e.g. from legacy files) never match a date filter.
+    """
+    numbers = np.arange(1, len(records) + 1)[games]
+    selected = records[games]
+    if since is None and until is None and player is None and opponent is None:
+        return numbers, selected
+
+    mask = np.ones(len(numbers), dtype=bool)
+
+    if since is not None:
+        mask &= selected["timestamp"] >= since
+    if until is not None:
+        mask &= selected["timestamp"] < until
+    if player is not None:
+        mask &= selected["player"] == player.encode()
+    if opponent is not None:
+        mask &= selected["opponent"] == opponent.encode()
+
+    return numbers[mask], selected[mask]
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Return the means of every `window` consecutive values (`len(values) - window + 1` of them)."""
+    if len(values) < window:
+        return np.zeros(0)
+    sums = np.cumsum(values, dtype=float)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums[window - 1 :] / window
+
+
+def score_counts(scores: np.ndarray) -> np.ndarray:
+    """
+    Return how many games scored each value in each category: `counts[i, v]` is the number of rows
+    of `scores` (one per game, scores are never negative in a finished game) with value `v` in column `i`.
+    """
+    categories = scores.shape[1]
+    size = int(scores.max(initial=0)) + 1
+    # a single bincount over all categories, each one offset into its own range of values
+    flat = (scores + np.arange(categories) * size).ravel()
+    return np.bincount(flat, minlength=categories * size).reshape(categories, size)
+
+
+def counted_percentiles(counts: np.ndarray, percentiles: tuple[int, ...]) -> np.ndarray:
+    """
+    Return the `percentiles` of each row of value `counts` (see `score_counts`), the same as
+    `np.percentile` (linear interpolation) over the values they count, without sorting them.
+    """
+    n = counts[0].sum()
+    positions = (n - 1) * np.asarray(percentiles) / 100
+    below, fraction = np.floor(positions).astype(int), positions % 1
+    above = np.minimum(below + 1, n - 1)
+
+    cumulative = counts.cumsum(axis=1)
+    # the k-th smallest value of a row is the first value whose cumulative count exceeds k
+    low = np.array([np.searchsorted(row, below, side="right") for row in cumulative])
+    high = np.array([np.searchsorted(row, above, side="right") for row in cumulative])
+    return low + (high - low) * fraction
+
+
+def summarize(
+    numbers: np.ndarray, records: np.ndarray, window: int = 100, percentiles: tuple[int, ...] = (25, 50, 75, 95)
+) -> dict:
+    """
+    Return statistics of the games `records` (numbered `numbers`, see `filter_records`) as a JSON
+    serializable dict: the distribution of total scores, the rolling mean of the total score over
+    `window` games (sampled every `window` games), per-category means and percentiles, the upper
+    bonus rate, the Yahtzee frequency, rerolls and the win rate against the opponent.
+    """
+    summary: dict = {"games": len(records)}
+    if len(records) == 0:
+        return summary
+
+    # a contiguous copy of the scores, every statistic below is a pass over them
+    scores = np.ascontiguousarray(records["scores"])
+    bonuses = upper_bonuses(scores)
+    # same as `total_scores`, without computing the bonuses twice
+    totals = scores.sum(axis=1) + bonuses
+    summary["total"] = {
+        "mean": float(totals.mean()),
+        "std": float(totals.std()),
+        "min": int(totals.min()),
+        "max": int(totals.max()),
+        "percentiles": dict(zip(map(str, percentiles), np.percentile(totals, percentiles).tolist())),
+    }
+
+    means = rolling_mean(totals, window)
+    # the mean of the last `window` games is always included
+    sampled = np.unique(np.r_[np.arange(0, len(means), window), len(means) - 1]) if len(means) else []
+    summary["rolling_mean"] = {
+        "window": window,
+        "games": numbers[window - 1 :][sampled].tolist(),
+        "values": means[sampled].tolist(),
+    }
+
+    counts = score_counts(scores)
+    category_means = counts @ np.arange(counts.shape[1]) / len(scores)
+    category_percentiles = counted_percentiles(counts, percentiles)
+    summary["categories"] = {
+        category.name.lower(): {
+            "mean": float(category_means[i]),
+            "zero_rate": float(counts[i, 0] / len(scores)),
+            "percentiles": dict(zip(map(str, percentiles), category_percentiles[i].tolist())),
+        }
+        for i, category in enumerate(list(ScoreCategory)[1:])
+    }
+
+    # every extra Yahtzee adds its bonus to the Yahtzee cell
+    yahtzees = scores[:, ScoreCategory.YAHTZEE.value] >= YAHTZEE_SCORE
+    summary["bonus_rate"] = float((bonuses > 0).mean())
+    summary["yahtzee_rate"] = float(yahtzees.mean())
+    summary["yahtzees"] = int(yahtzees.sum())
+    summary["rerolls_mean"] = float(rerolls(records).mean())
+
+    # opponent scores are unknown for games from legacy files
+    known = records["opponent_score"] >= 0
+    summary["win_rate"] = float((totals[known] > records["opponent_score"][known]).mean()) if known.any() else None
+
+    return summary
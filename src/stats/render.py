@@ -0,0 +1,136 @@
+import os
+import sys
+
+import numpy as np
+
+from constants import ScoreCategory
+
+from .downsample import lttb, min_max
+from .rollup import BUCKET_SIZE, bucket_means, read_rollup, running_sums
+from .store import category_scores, load_records, rerolls, total_scores
+
+# longest history plotted with a marker on every game
+MARKER_LIMIT = 200
+
+
+def image_path(statistics_file: str) -> str:
+    """Return the file the statistics of `statistics_file` are rendered to."""
+    return f"{statistics_file}.png"
+
+
+def source_path(statistics_file: str) -> str:
+    """Return the file that records which version of `statistics_file` its image was rendered from."""
+    return f"{image_path(statistics_file)}.source"
+
+
+def file_version(statistics_file: str) -> str:
+    """Return the size and modification time of `statistics_file`, which change whenever a game is saved."""
+    stat = os.stat(statistics_file)
+    return f"{stat.st_size} {stat.st_mtime_ns}"
+
+
+def is_rendered(statistics_file: str) -> bool:
+    """Return whether the image of `statistics_file` is up to date, i.e. no game was saved since it was rendered."""
+    if not os.path.isfile(image_path(statistics_file)):
+        return False
+    try:
+        with open(source_path(statistics_file), encoding="utf8") as file:
+            return file.read() == file_version(statistics_file)
+    except OSError:
+        return False
+
+
+def render_statistics(statistics_file: str):
+    """
+    Plot the evolution of the total score, category scores and rerolls of the games saved in
+    `statistics_file` and save the figure to `image_path(statistics_file)`, along with the version
+    of the file it shows (see `is_rendered`). The image is written to a temporary file first, so a
+    half-written image is never shown.
+
+    Rendering imports matplotlib and takes a while, so the game runs this in a separate process
+    (see `__main__` below).
+    """
+    import matplotlib
+
+    # rendered straight to a file, no GUI backend needed
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+
+    # taken before the records are read, so that a game saved while rendering makes the image outdated
+    version = file_version(statistics_file)
+    records = load_records(statistics_file)
+    if len(records) == 0:
+        raise ValueError("No statistics available!")
+    # the game's statistics writer may be updating the rollup, so it is only read here
+    buckets = read_rollup(statistics_file, records)
+    totals = running_sums(buckets)
+    scores_by_category = category_scores(records)
+    games = np.arange(1, len(records) + 1)
+
+    # Create the figure and subplots
+    fig, ax = plt.subplots(3, 1, figsize=(12, 10), sharex=True)
+    # series are downsampled to about one point per horizontal pixel, so drawing them takes the
+    # same time however many games were played
+    points = int(fig.get_figwidth() * fig.dpi)
+    # markers only make sense while single games can be told apart
+    marker = "o" if len(records) <= MARKER_LIMIT else None
+
+    # Plot total score evolution
+    ax[0].plot(*lttb(games, total_scores(records), points), marker=marker, label="Total Score", color="blue")
+    if len(buckets) > 1:
+        bucket_centers = np.arange(len(buckets)) * BUCKET_SIZE + (buckets["games"] + 1) / 2
+        ax[0].plot(
+            bucket_centers,
+            bucket_means(buckets)["total"],
+            label=f"Average per {BUCKET_SIZE} games",
+            color="orange",
+        )
+    ax[0].set_title(f"Total Score Evolution (average {totals['total'] / totals['games']:.1f})")
+    ax[0].set_ylabel("Total Score")
+    ax[0].legend()
+    ax[0].grid(True)
+
+    # Plot category score evolution
+    cmap = matplotlib.colormaps["tab20"]
+    colors = [cmap(i / len(scores_by_category)) for i in range(len(scores_by_category))]
+    for category_data, category_type, color in zip(scores_by_category, list(ScoreCategory)[1:], colors):
+        ax[1].plot(
+            *min_max(games, category_data, points),
+            marker=marker,
+            label=category_type.name.capitalize().replace("_", " "),
+            color=color,
+        )
+    ax[1].set_title("Category Score Evolution")
+    ax[1].set_ylabel("Score per Category")
+    ax[1].legend(loc="upper left", bbox_to_anchor=(1, 1))
+    ax[1].grid(True)
+
+    # Plot reroll evolution
+    ax[2].plot(*min_max(games, rerolls(records), points), marker=marker, label="Rerolls Used", color="red")
+    ax[2].set_title("Reroll Evolution")
+    ax[2].set_xlabel("Game Number")
+    ax[2].set_ylabel("Rerolls Used")
+    ax[2].xaxis.get_major_locator().set_params(integer=True)
+    ax[2].yaxis.get_major_locator().set_params(integer=True)
+    ax[2].legend()
+    ax[2].grid(True)
+
+    # Adjust layout to fit the category legend
+    plt.tight_layout(rect=(0, 0, 0.85, 1))
+
+    image = image_path(statistics_file)
+    temp_image = f"{image}.tmp.png"
+    plt.savefig(temp_image)
+    plt.close(fig)
+    os.replace(temp_image, image)
+    with open(source_path(statistics_file), "w", encoding="utf8") as file:
+        file.write(version)
+
+
+if __name__ == "__main__":
+    # python -m stats.render <statistics file>
+    try:
+        render_statistics(sys.argv[1])
+    except Exception as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,162 @@
+import os
+
+import numpy as np
+
+from constants import CATEGORY_COUNT
+
+from .store import load_records, rerolls, total_scores, upper_bonuses
+
+# games aggregated by each bucket of the rollup
+BUCKET_SIZE = 100
+
+# aggregates of `BUCKET_SIZE` consecutive games (the last bucket may hold fewer games)
+BUCKET_DTYPE = np.dtype(
+    [
+        ("games", "<i4"),
+        ("total_sum", "<i8"),
+        ("total_min", "<i4"),
+        ("total_max", "<i4"),
+        ("category_sums", "<i8", (CATEGORY_COUNT,)),
+        ("rerolls_sum", "<i8"),
+        ("bonuses", "<i4"),
+    ]
+)
+
+
+def rollup_path(statistics_file: str) -> str:
+    return f"{statistics_file}.rollup"
+
+
+def empty_buckets() -> np.ndarray:
+    return np.zeros(0, dtype=BUCKET_DTYPE)
+
+
+def load_rollup(statistics_file: str) -> np.ndarray:
+    """
+    Return the buckets of the rollup of `statistics_file` (as last updated, see `sync_rollup`),
+    memory-mapped, or no buckets if there is no valid rollup.
+    """
+    path = rollup_path(statistics_file)
+    count = os.path.getsize(path) // BUCKET_DTYPE.itemsize if os.path.isfile(path) else 0
+    if count == 0:
+        return empty_buckets()
+
+    buckets = np.memmap(path, dtype=BUCKET_DTYPE, mode="r", shape=(count,))
+    # every bucket but the last one is full, so checking the last one catches interrupted updates
+    if not 0 < buckets[-1]["games"] <= BUCKET_SIZE:
+        return empty_buckets()
+    return buckets
+
+
+def rollup_games(buckets: np.ndarray) -> int:
+    """Return the number of games aggregated by `buckets`."""
+    if len(buckets) == 0:
+        return 0
+    return (len(buckets) - 1) * BUCKET_SIZE + int(buckets[-1]["games"])
+
+
+def fold_records(games: int, last_bucket: np.ndarray | None, records: np.ndarray) -> np.ndarray:
+    """
+    Fold `records`, the games played after the first `games` ones, into the rollup whose last
+    bucket is `last_bucket`. Returns the buckets the new games fall into, which replace the buckets
+    from index `games // BUCKET_SIZE` on.
+    """
+    first = games // BUCKET_SIZE
+    last = (games + len(records) - 1) // BUCKET_SIZE
+
+    # games are consecutive, so each changed bucket aggregates a contiguous slice of `records`
+    starts = np.arange(first, last + 1) * BUCKET_SIZE - games
+    starts[0] = 0
+    totals = total_scores(records)
+
+    changed = np.zeros(last - first + 1, dtype=BUCKET_DTYPE)
+    changed["games"] = np.diff(starts, append=len(records))
+    changed["total_sum"] = np.add.reduceat(totals, starts)
+    changed["total_min"] = np.minimum.reduceat(totals, starts)
+    changed["total_max"] = np.maximum.reduceat(totals, starts)
+    changed["category_sums"] = np.add.reduceat(records["scores"], starts, dtype=np.int64)
+    changed["rerolls_sum"] = np.add.reduceat(rerolls(records), starts, dtype=np.int64)
+    changed["bonuses"] = np.add.reduceat(upper_bonuses(records) > 0, starts, dtype=np.int32)
+
+    if games % BUCKET_SIZE:
+        # the new games of the first bucket are merged with the ones it already had
+        merged = changed[0]
+        merged["games"] += last_bucket["games"]
+        merged["total_min"] = min(merged["total_min"], last_bucket["total_min"])
+        merged["total_max"] = max(merged["total_max"], last_bucket["total_max"])
+        for field in ("total_sum", "category_sums", "rerolls_sum", "bonuses"):
+            merged[field] += last_bucket[field]
+
+    return changed
+
+
+def sync_rollup(statistics_file: str) -> np.ndarray:
+    """
+    Bring the rollup of `statistics_file` up to date with it and return its buckets. Only the games
+    saved since the last update are read and only the buckets they fall into are rewritten, so
+    calling this after every saved game costs the same however long the history is. A rollup that
+    does not match the statistics file (e.g. the file was replaced) is rebuilt from scratch.
+    """
+    records = load_records(statistics_file)
+    buckets = load_rollup(statistics_file)
+    games = rollup_games(buckets)
+    if games == len(records):
+        return buckets
+    if games > len(records):
+        games = 0
+
+    last_bucket = buckets[-1].copy() if games else None
+    # the mapping must be closed before the file is rewritten (Windows does not allow truncating a mapped file)
+    del buckets
+
+    changed = fold_records(games, last_bucket, records[games:])
+    with open(rollup_path(statistics_file), "r+b" if games else "wb") as file:
+        file.seek(games // BUCKET_SIZE * BUCKET_DTYPE.itemsize)
+        file.write(changed.tobytes())
+        file.truncate()
+
+    return load_rollup(statistics_file)
+
+
+def read_rollup(statistics_file: str, records: np.ndarray) -> np.ndarray:
+    """
+    Return the buckets of the rollup of `statistics_file` up to date with its `records`, without
+    writing the rollup, which only the game updates (see `sync_rollup`). The games the rollup is
+    missing, and those of its last partial bucket, are folded in memory.
+    """
+    buckets = load_rollup(statistics_file)
+    games = rollup_games(buckets)
+    if games == len(records):
+        return buckets
+    if games > len(records):
+        # the rollup does not match the records (e.g. it was updated after they were loaded)
+        games = 0
+
+    # full buckets never change, the last one may be in the middle of being rewritten
+    full = games // BUCKET_SIZE
+    if full * BUCKET_SIZE == len(records):
+        return buckets[:full]
+    changed = fold_records(full * BUCKET_SIZE, None, records[full * BUCKET_SIZE :])
+    return np.concatenate([buckets[:full], changed])
+
+
+def bucket_means(buckets: np.ndarray) -> dict[str, np.ndarray]:
+    """Return the mean total score, category scores, rerolls and bonus rate of the games of each bucket."""
+    games = buckets["games"].astype(float)
+    return {
+        "total": buckets["total_sum"] / games,
+        "categories": buckets["category_sums"] / games[:, None],
+        "rerolls": buckets["rerolls_sum"] / games,
+        "bonus_rate": buckets["bonuses"] / games,
+    }
+
+
+def running_sums(buckets: np.ndarray) -> dict[str, int | np.ndarray]:
+    """Return the number of games aggregated by `buckets` and their summed scores, rerolls and bonuses."""
+    return {
+        "games": int(buckets["games"].sum()),
+        "total": int(buckets["total_sum"].sum()),
+        "categories": buckets["category_sums"].sum(axis=0),
+        "rerolls": int(buckets["rerolls_sum"].sum()),
+        "bonuses": int(buckets["bonuses"].sum()),
+    }
@@ -0,0 +1,174 @@
+import os
+
+import numpy as np
+
+from constants import CATEGORY_COUNT
+
+UPPER_SECTION = 6
+UPPER_BONUS_THRESHOLD = 63
+UPPER_BONUS = 35
+
+# the statistics file starts with a header identifying its format, followed by fixed-size records
+MAGIC = b"YZST"
+FORMAT_VERSION = 2
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u2"), ("record_size", "<u2"), ("reserved", "V8")])
+
+# a game: the scores of the player in each category, the number of rerolls they used and the final
+# score of their opponent, when the game ended (unix time), how long it took (seconds), the seed
+# of the game (-1 if it was not seeded) and who played it (e.g. "human" against "q:7")
+RECORD_DTYPE = np.dtype(
+    [
+        ("scores", "<i4", (CATEGORY_COUNT,)),
+        ("rerolls", "<i4"),
+        ("opponent_score", "<i4"),
+        ("timestamp", "<f8"),
+        ("duration", "<f4"),
+        ("seed", "<i8"),
+        ("player", "S16"),
+        ("opponent", "S16"),
+    ]
+)
+
+# a game as saved before the file had a header ("14i" in native byte order): the scores of the
+# player in each category, followed by the number of rerolls they used
+LEGACY_RECORD_DTYPE = np.dtype([("scores", "=i4", (CATEGORY_COUNT,)), ("rerolls", "=i4")])
+
+
+def make_header() -> bytes:
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = FORMAT_VERSION
+    header["record_size"] = RECORD_DTYPE.itemsize
+    return header.tobytes()
+
+
+def make_record(
+    scores: list[int],
+    rerolls: int,
+    opponent_score: int = -1,
+    timestamp: float = np.nan,
+    duration: float = np.nan,
+    seed: int | None = None,
+    player: str = "",
+    opponent: str = "",
+) -> np.ndarray:
+    """Return a record (an array of one `RECORD_DTYPE` element) of a game, see `RECORD_DTYPE`."""
+    record = np.zeros(1, dtype=RECORD_DTYPE)
+    record["scores"] = scores
+    record["rerolls"] = rerolls
+    record["opponent_score"] = opponent_score
+    record["timestamp"] = timestamp
+    record["duration"] = duration
+    record["seed"] = -1 if seed is None else seed
+    record["player"] = player.encode()[:16]
+    record["opponent"] = opponent.encode()[:16]
+    return record
+
+
+def read_version(filepath: str) -> int:
+    """
+    Return the format version of the statistics file `filepath`: `FORMAT_VERSION` for files with
+    a header, 1 for legacy files (headerless "14i" records) and 0 for missing or empty files.
+    """
+    if not os.path.isfile(filepath) or os.path.getsize(filepath) == 0:
+        return 0
+
+    header = np.fromfile(filepath, dtype=HEADER_DTYPE, count=1)
+    if len(header) == 0 or header["magic"][0] != MAGIC:
+        return 1
+    if header["version"][0] != FORMAT_VERSION or header["record_size"][0] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"Unsupported statistics format (version {header['version'][0]}) in {filepath}")
+    return FORMAT_VERSION
+
+
+def from_legacy(records: np.ndarray) -> np.ndarray:
+    """Convert `LEGACY_RECORD_DTYPE` records to `RECORD_DTYPE`, with unknown metadata."""
+    converted = np.zeros(len(records), dtype=RECORD_DTYPE)
+    converted["scores"] = records["scores"]
+    converted["rerolls"] = records["rerolls"]
+    converted["opponent_score"] = -1
+    converted["timestamp"] = np.nan
+    converted["duration"] = np.nan
+    converted["seed"] = -1
+    return converted
+
+
+def load_records(filepath: str) -> np.ndarray:
+    """
+    Return the games saved in the statistics file `filepath` as a structured array of
+    `RECORD_DTYPE`. The file is memory-mapped (read-only), so only the pages actually used by a
+    computation are read from disk. A trailing partial record (e.g. a write in progress) is ignored.
+
+    Legacy files are read as well, but are converted in memory (see `compact`, which migrates them).
+    """
+    version = read_version(filepath)
+    if version == 1:
+        count = os.path.getsize(filepath) // LEGACY_RECORD_DTYPE.itemsize
+        return from_legacy(np.memmap(filepath, dtype=LEGACY_RECORD_DTYPE, mode="r", shape=(count,)))
+
+    count = (os.path.getsize(filepath) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize if version else 0
+    if count <= 0:
+        # an empty file cannot be memory-mapped
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(filepath, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize, shape=(count,))
+
+
+def needs_compaction(filepath: str) -> bool:
+    """
+    Return whether `compact` would change the statistics file `filepath`: it is in the legacy format
+    or ends with a partial record (left by an interrupted write).
+    """
+    version = read_version(filepath)
+    if version == 0:
+        return False
+    if version == 1:
+        return True
+    return (os.path.getsize(filepath) - HEADER_DTYPE.itemsize) % RECORD_DTYPE.itemsize != 0
+
+
+def compact(filepath: str):
+    """
+    Rewrite the statistics file `filepath` in the current format, keeping only its complete
+    records. The new file is written next to the old one and replaces it atomically once it is
+    safely on disk, so the statistics are never lost halfway.
+    """
+    records = load_records(filepath)
+    temp_path = f"{filepath}.compact"
+    with open(temp_path, "wb") as file:
+        file.write(make_header())
+        file.write(np.ascontiguousarray(records).tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    # the mapping must be closed before the file is replaced (Windows does not allow replacing a mapped file)
+    del records
+    os.replace(temp_path, filepath)
+
+
+def scores_of(records: np.ndarray) -> np.ndarray:
+    """
+    Return the category scores of `records`, one row per game. The functions below also accept such
+    scores instead of records, e.g. a contiguous copy (fields of records are strided, so repeated
+    passes over a copy of the scores are faster on large histories).
+    """
+    return records["scores"] if records.dtype.names else records
+
+
+def upper_bonuses(records: np.ndarray) -> np.ndarray:
+    """Return the upper section bonus of each game in `records`."""
+    upper_scores = scores_of(records)[:, :UPPER_SECTION].sum(axis=1)
+    return np.where(upper_scores >= UPPER_BONUS_THRESHOLD, UPPER_BONUS, 0)
+
+
+def total_scores(records: np.ndarray) -> np.ndarray:
+    """Return the total score of each game in `records` (same as `PlayerState.total_score`)."""
+    return scores_of(records).sum(axis=1) + upper_bonuses(records)
+
+
+def category_scores(records: np.ndarray) -> np.ndarray:
+    """Return the scores of `records` by category: row `i` holds the scores of every game in category `i`."""
+    return scores_of(records).T
+
+
+def rerolls(records: np.ndarray) -> np.ndarray:
+    """Return the number of rerolls used in each game in `records`."""
+    return records["rerolls"]
@@ -0,0 +1,104 @@
+import os
+import queue
+import sys
+import threading
+
+import numpy as np
+
+from .rollup import sync_rollup
+from .store import compact, make_header, needs_compaction
+
+
+class StatisticsWriter:
+    """
+    Appends games to a statistics file from a background thread, so that saving a game never
+    blocks the game loop on disk I/O.
+
+    Games are written in batches: the writer waits up to `flush_interval` seconds for more games
+    after the first one and writes them all with a single fsync. After each batch the rollup of
+    the file is brought up to date. Before each batch the file is compacted if needed (migrated
+    from the legacy format, or trimmed of a partial record left by a crash), since appending to it
+    as it is would corrupt it.
+
+    Errors are reported on stderr; the games of a batch that could not be written are kept and
+    written with the next batch.
+    """
+
+    def __init__(self, filepath: str, flush_interval: float = 0.5, max_batch: int = 256):
+        self.filepath = filepath
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+
+        self.queue: queue.Queue[np.ndarray | None] = queue.Queue()
+        self.pending: list[np.ndarray] = []
+        self.thread = threading.Thread(target=self.__run, name="statistics-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, record: np.ndarray):
+        """Queue the game `record` (see `make_record`) to be written."""
+        self.queue.put(record)
+
+    def close(self, timeout: float | None = None):
+        """Write the games still queued and stop the writer."""
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+    def __run(self):
+        closed = False
+        while not closed:
+            if not self.pending:
+                record = self.queue.get()
+                if record is None:
+                    break
+                self.pending.append(record)
+
+            # gather the games saved in the meantime (e.g. games played back to back without a window)
+            try:
+                while len(self.pending) < self.max_batch:
+                    record = self.queue.get(timeout=self.flush_interval)
+                    if record is None:
+                        closed = True
+                        break
+                    self.pending.append(record)
+            except queue.Empty:
+                pass
+
+            if not self.__write_batch() and not closed:
+                # try again later rather than spinning on a failing disk
+                closed = self.__wait_for_close(self.flush_interval)
+
+        if self.pending:
+            self.__write_batch()
+
+    def __wait_for_close(self, timeout: float) -> bool:
+        try:
+            record = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return False
+        if record is None:
+            return True
+        self.pending.append(record)
+        return False
+
+    def __write_batch(self) -> bool:
+        try:
+            if needs_compaction(self.filepath):
+                compact(self.filepath)
+
+            records = np.concatenate(self.pending)
+            with open(self.filepath, "ab") as file:
+                if file.tell() == 0:
+                    file.write(make_header())
+                file.write(records.tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+            self.pending = []
+        except (Exception,) as e:
+            print(f"Could not save statistics: {e}", file=sys.stderr)
+            return False
+
+        try:
+            sync_rollup(self.filepath)
+        except (Exception,) as e:
+            print(f"Could not update the statistics rollup: {e}", file=sys.stderr)
+        return True
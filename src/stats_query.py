@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from time import perf_counter
+
+import numpy as np
+
+from stats import load_records
+from stats.query import filter_records, summarize
+
+
+def parse_date(text: str) -> float:
+    """Return the unix time of an ISO 8601 date (or date and time), in local time unless it has an offset."""
+    return datetime.fromisoformat(text).timestamp()
+
+
+def parse_slice(text: str) -> slice:
+    return slice(*(int(part) if part else None for part in text.split(":")))
+
+
+parser = argparse.ArgumentParser(description="Query the statistics of saved Yahtzee games.")
+parser.add_argument(
+    "files", nargs="*", default=["yahtzee-stats.bin"], help="statistics files, combined in the given order"
+)
+parser.add_argument(
+    "--games",
+    type=parse_slice,
+    default=slice(None),
+    help="only use the given slice of games, e.g. 100:200 or --games=-1000: for the last 1000 games",
+)
+parser.add_argument("--since", type=parse_date, help="only use games played from this date on, e.g. 2024-05-01")
+parser.add_argument("--until", type=parse_date, help="only use games played before this date")
+parser.add_argument("--player", help='only use games played by this player, e.g. "human"')
+parser.add_argument("--opponent", help='only use games played against this opponent, e.g. "q:7"')
+parser.add_argument("--window", type=int, default=100, help="number of games the rolling mean is computed over")
+parser.add_argument(
+    "--percentiles", default="25,50,75,95", help="comma separated list of percentiles of the scores to compute"
+)
+parser.add_argument("--json", action="store_true", help="print the statistics as JSON instead of tables")
+args = parser.parse_args()
+
+if args.window < 1:
+    parser.error("--window must be positive")
+try:
+    percentiles = tuple(int(p) for p in args.percentiles.split(","))
+except ValueError:
+    percentiles = ()
+if not percentiles or not all(0 <= p <= 100 for p in percentiles):
+    parser.error(f"invalid percentiles: {args.percentiles}")
+if missing_files := [file for file in args.files if not os.path.isfile(file)]:
+    parser.error(f"no such statistics files: {', '.join(missing_files)}")
+
+start = perf_counter()
+records = [load_records(file) for file in args.files]
+records = records[0] if len(records) == 1 else np.concatenate(records)
+numbers, records = filter_records(
+    records, args.games, since=args.since, until=args.until, player=args.player, opponent=args.opponent
+)
+summary = summarize(numbers, records, window=args.window, percentiles=percentiles)
+elapsed = perf_counter() - start
+
+if args.json:
+    print(json.dumps(summary, indent=2))
+elif summary["games"] == 0:
+    print("No games match the given filters.")
+else:
+    total = summary["total"]
+    print(f"games: {summary['games']}")
+    print(f"total score: mean {total['mean']:.1f}, std {total['std']:.1f}, min {total['min']}, max {total['max']}")
+    print("percentiles: " + ", ".join(f"p{p} {value:.1f}" for p, value in total["percentiles"].items()))
+
+    rolling = summary["rolling_mean"]
+    if rolling["values"]:
+        values = np.array(rolling["values"])
+        print(
+            f"rolling mean ({rolling['window']} games): last {values[-1]:.1f}, "
+            f"best {values.max():.1f} (game {rolling['games'][values.argmax()]}), "
+            f"worst {values.min():.1f} (game {rolling['games'][values.argmin()]})"
+        )
+
+    print(f"upper bonus rate: {summary['bonus_rate']:.1%}")
+    print(f"yahtzee rate: {summary['yahtzee_rate']:.1%} ({summary['yahtzees']} games)")
+    print(f"rerolls per game: {summary['rerolls_mean']:.2f}")
+    if summary["win_rate"] is not None:
+        print(f"win rate: {summary['win_rate']:.1%}")
+
+    print()
+    header = ["category", "mean", "zero"] + [f"p{p}" for p in percentiles]
+    rows = [
+        [name.capitalize().replace("_", " "), f"{category['mean']:.1f}", f"{category['zero_rate']:.0%}"]
+        + [f"{value:.0f}" for value in category["percentiles"].values()]
+        for name, category in summary["categories"].items()
+    ]
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    for row in [header, *rows]:
+        # category names are left aligned, numbers right aligned
+        cells = [row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]
+        print("  ".join(cells))
+
+print(f"{len(records)} games in {elapsed * 1000:.1f} ms", file=sys.stderr)
@@ -1,4 +1,7 @@
 import math
+import os
+import subprocess
+import sys
 from collections import Counter
 
 import numpy as np
@@ -104,5 +107,48 @@ def distance(a: tuple[float, float], b: tuple[float, float]):
     return math.sqrt((b[0] - a[0]) ** 2 + (b[1] - a[1]) ** 2)
 
 
+def show_message_box(kind: str, title: str, message: str):
+    """
+    Show a tkinter message box of the given kind ("info", "warning" or "error"). tkinter is
+    imported here, on first use, so that headless code paths never load it.
+    """
+    import tkinter as tk
+    from tkinter import messagebox
+
+    root = tk.Tk()
+    root.withdraw()
+    getattr(messagebox, f"show{kind}")(title, message)
+    root.destroy()
+
+
+def open_file(path: str):
+    """
+    Open the file at `path` with the default application of the platform (e.g. an image viewer),
+    without waiting for it.
+    """
+    if sys.platform == "win32":
+        os.startfile(path)
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", path])
+    else:
+        subprocess.Popen(["xdg-open", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def merge_rects(rects: list):
+    """
+    Given a list of pygame rects, returns a list of rects covering the same area where no two rects
+    overlap, by merging overlapping rects into their bounding rect.
+    """
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        # merging two rects can make the result overlap rects that were merged before it
+        while (index := rect.collidelist(merged)) != -1:
+            rect.union_ip(merged.pop(index))
+        merged.append(rect)
+
+    return merged
+
+
 # if __name__ == "__main__":
 #     print(score_roll([0, 1, 2, 3, 4]))
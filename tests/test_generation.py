@@ -0,0 +1,38 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from language.generation import FirstSentenceStoppingCriteria  # noqa: E402
+
+EOS, PAD = 0, 1
+
+
+class Tokenizer:
+    eos_token_id = EOS
+    pad_token_id = PAD
+
+    def get_vocab(self) -> dict[str, int]:
+        return {"<eos>": EOS, "<pad>": PAD, ".": 2, "word": 3}
+
+    def convert_tokens_to_string(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+def step(criteria: FirstSentenceStoppingCriteria, input_ids: list[list[int]]) -> bool:
+    return criteria(torch.tensor(input_ids), torch.zeros(0))
+
+
+def test_stops_when_every_sequence_ended_or_completed_a_sentence():
+    criteria = FirstSentenceStoppingCriteria(Tokenizer(), prompt_length=1, batch_size=3)
+
+    assert not step(criteria, [[3, 3], [3, EOS], [3, 3]])
+    # the sequence that ended is padded from then on, and stays finished
+    assert not step(criteria, [[3, 3, 2], [3, EOS, PAD], [3, 3, 3]])
+    assert step(criteria, [[3, 3, 2, PAD], [3, EOS, PAD, PAD], [3, 3, 3, EOS]])
+
+
+def test_ignores_the_prompt():
+    criteria = FirstSentenceStoppingCriteria(Tokenizer(), prompt_length=2, batch_size=1)
+
+    assert not step(criteria, [[3, EOS]])
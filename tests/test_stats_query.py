@@ -0,0 +1,19 @@
+import numpy as np
+
+from constants import CATEGORY_COUNT, ScoreCategory
+from stats import make_record
+from stats.query import summarize
+
+
+def game(yahtzee: int) -> np.ndarray:
+    scores = [0] * CATEGORY_COUNT
+    scores[ScoreCategory.YAHTZEE.value] = yahtzee
+    return make_record(scores, rerolls=0)
+
+
+def test_yahtzee_rate_counts_bonus_yahtzees():
+    records = np.concatenate([game(0), game(50), game(150), game(250)])
+    summary = summarize(np.arange(1, len(records) + 1), records, window=1)
+
+    assert summary["yahtzees"] == 3
+    assert summary["yahtzee_rate"] == 0.75